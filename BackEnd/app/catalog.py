@@ -0,0 +1,196 @@
+"""
+Catálogo combinado das fontes (uma UnidadesCache por prefeitura).
+
+- `?cidade=x` lê só o snapshot daquela fonte (índices e payloads próprios);
+- sem `cidade`, as fontes são combinadas num snapshot único, remontado só
+  quando alguma delas muda;
+- fontes frias carregam em paralelo, em background: uma leitura combinada
+  responde na hora com as fontes que já têm snapshot e lista as demais em
+  `CacheRead.missing`; só quando nenhuma tem é que ela espera, até a
+  primeira ficar pronta (no máximo `cold_wait` segundos);
+- cada fonte tem o seu loop de refresh: renovações correm em paralelo e o
+  tempo de refresh não soma o das cidades lentas;
+- o feed de mudanças é calculado fonte a fonte, com a versão de cada uma.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+
+from app.changes import Changes, format_version, parse_version
+from app.search import normalize
+from app.unidades_cache import CacheRead, UnidadesCache, UnidadesSnapshot
+
+
+class UnknownCityError(ValueError):
+    pass
+
+
+class Catalog:
+    def __init__(self, caches: Dict[str, UnidadesCache], cold_wait: float = 30.0):
+        self.caches = caches
+        self.cold_wait = cold_wait
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(caches)), thread_name_prefix="catalog-load")
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # snapshot combinado atual: ((slug, hash) das fontes, snapshot)
+        self._merged: Optional[Tuple[Tuple[Tuple[str, str], ...], UnidadesSnapshot]] = None
+
+    @property
+    def slugs(self) -> List[str]:
+        return list(self.caches)
+
+    def resolve(self, cidade: Optional[str]) -> Optional[str]:
+        """"Quixadá" -> "quixada"; None/"" -> None (todas)."""
+        slug = normalize(cidade)
+        if not slug:
+            return None
+        if slug not in self.caches:
+            raise UnknownCityError(f"Cidade desconhecida: {cidade}. Disponíveis: {', '.join(self.caches)}")
+        return slug
+
+    # -------------------------
+    # leitura
+    # -------------------------
+    def read(self, cidade: Optional[str] = None) -> CacheRead:
+        return self._combine(*self._read_sources(self.resolve(cidade)))
+
+    def changes(self, cidade: Optional[str], since: Optional[str]) -> Tuple[CacheRead, Changes]:
+        """Mudanças desde o token `since` (ver app.changes); ValueError se o token for inválido."""
+        known = parse_version(since)
+        reads, missing = self._read_sources(self.resolve(cidade))
+        read = self._combine(reads, missing)
+
+        # fontes fora do escopo (ou que não existem mais): só o catálogo inteiro resolve
+        scope = {slug for slug, _ in reads} | set(missing)
+        resync = not known or any(slug not in scope for slug in known)
+        changes = Changes(versao="")
+        if not resync:
+            for slug, r in reads:
+                snap = r.snapshot
+                prev = known.get(slug)
+                if prev is None:
+                    # cidade nova para este cliente
+                    changes.adicionadas.extend(snap.unidades)
+                    continue
+                if prev.matches(snap.version, snap.hash):
+                    continue
+                old = self.caches[slug].hashes_at(prev)
+                if old is None:
+                    # versão fora do anel e do SnapshotStore
+                    resync = True
+                    break
+                changes.add_diff(old, snap)
+
+        if resync:
+            return read, Changes(
+                versao=format_version(read.versions), ressincronizar=True, adicionadas=read.snapshot.unidades
+            )
+        # fontes carregando ou fora do ar: o cliente mantém o que tem delas
+        kept = tuple(known[slug] for slug in missing if slug in known)
+        changes.versao = format_version(
+            tuple(sorted(read.versions + kept, key=lambda v: self.slugs.index(v.fonte)))
+        )
+        return read, changes
+
+    def _read_sources(self, slug: Optional[str]) -> Tuple[List[Tuple[str, CacheRead]], Tuple[str, ...]]:
+        """Leituras das fontes no escopo (uma cidade ou todas) e as que ficaram de fora."""
+        if slug is not None:
+            return [(slug, self.caches[slug].get())], ()
+        if len(self.caches) == 1:
+            slug, cache = next(iter(self.caches.items()))
+            return [(slug, cache.get())], ()
+
+        reads: Dict[str, CacheRead] = {}
+        errors: Dict[str, str] = {}
+        cold: Dict[str, Future] = {}
+
+        for slug, cache in self.caches.items():
+            if cache.snapshot is not None or cache.preload():
+                reads[slug] = cache.get()
+            else:
+                cold[slug] = self._load_cold(slug)
+
+        # só espera quem não tem nada para servir; com alguma fonte pronta, as
+        # frias carregam em background e ficam de fora desta resposta
+        if cold and not reads:
+            # processo frio: responde assim que a primeira fonte carregar
+            deadline = time.monotonic() + self.cold_wait
+            pending = set(cold.values())
+            while pending and time.monotonic() < deadline:
+                done, pending = wait(pending, timeout=deadline - time.monotonic(), return_when=FIRST_COMPLETED)
+                if any(f.exception() is None for f in done):
+                    break
+            for slug, fut in cold.items():
+                if not fut.done():
+                    errors[slug] = "carregando"
+                elif fut.exception() is not None:
+                    errors[slug] = str(fut.exception())
+                else:
+                    reads[slug] = fut.result()
+
+        if not reads:
+            raise RuntimeError("; ".join(f"{slug}: {err}" for slug, err in errors.items()))
+
+        ordered = [(slug, reads[slug]) for slug in self.caches if slug in reads]
+        return ordered, tuple(slug for slug in self.caches if slug not in reads)
+
+    def _combine(self, reads: List[Tuple[str, CacheRead]], missing: Tuple[str, ...]) -> CacheRead:
+        if len(reads) == 1 and not missing:
+            return reads[0][1]
+        last_errors = [f"{slug}: {r.last_error}" for slug, r in reads if r.last_error]
+        return CacheRead(
+            snapshot=self._merge([(slug, r.snapshot) for slug, r in reads]),
+            stale=any(r.stale for _, r in reads),
+            last_error="; ".join(last_errors) or None,
+            missing=missing,
+            versions=tuple(v for _, r in reads for v in r.versions),
+        )
+
+    def _load_cold(self, slug: str) -> Future:
+        # um carregamento por fonte, compartilhado pelas requisições que chegarem
+        with self._lock:
+            fut = self._loading.get(slug)
+            if fut is None or fut.done():
+                fut = self._loading[slug] = self._executor.submit(self.caches[slug].get)
+            return fut
+
+    def _merge(self, snaps: Sequence[Tuple[str, UnidadesSnapshot]]) -> UnidadesSnapshot:
+        if len(snaps) == 1:
+            return snaps[0][1]
+        key = tuple((slug, snap.hash) for slug, snap in snaps)
+        merged = self._merged
+        if merged is not None and merged[0] == key:
+            snap = merged[1]
+            ts = min(s.ts for _, s in snaps)
+            if snap.ts == ts:
+                return snap
+            # mesmo conteúdo, só renovado: reaproveita lista e índices
+            snap = UnidadesSnapshot(
+                unidades=snap.unidades, ts=ts, version=snap.version, hash=snap.hash, derived=snap.derived
+            )
+        else:
+            # as unidades já vêm marcadas com `cidade` (Source.tag): nada é copiado
+            snap = UnidadesSnapshot(
+                unidades=list(chain.from_iterable(s.unidades for _, s in snaps)),
+                ts=min(s.ts for _, s in snaps),
+                version=sum(s.version for _, s in snaps),
+                hash=hashlib.sha256("|".join(f"{slug}:{h}" for slug, h in key).encode("utf-8")).hexdigest(),
+            )
+        self._merged = (key, snap)
+        return snap
+
+    # -------------------------
+    # ciclo de vida
+    # -------------------------
+    def preload(self) -> None:
+        for cache in self.caches.values():
+            cache.preload()
+
+    async def run_refreshers(self) -> None:
+        """Um loop de refresh por fonte, em paralelo; deve rodar como task do lifespan."""
+        await asyncio.gather(*(cache.run_refresher() for cache in self.caches.values()))
@@ -0,0 +1,156 @@
+"""
+Feed de mudanças das unidades (/api/unidades/changes).
+
+Cada fonte guarda, num anel limitado, o hash de cada unidade das últimas
+versões do seu snapshot. Um cliente que já tem a versão `since` recebe só
+as unidades adicionadas, modificadas e removidas desde então; se a versão
+saiu do anel (e do SnapshotStore), recebe o catálogo inteiro para
+ressincronizar.
+
+A versão entregue ao cliente é um token `cidade:versao:hash` por fonte
+(separados por vírgula no catálogo combinado). O número da versão só cresce
+quando o conteúdo da fonte muda; o prefixo do hash impede que versões de
+linhagens diferentes (outro seed, worker sem snapshot compartilhado) sejam
+confundidas: na dúvida, ressincroniza.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+if TYPE_CHECKING:
+    from app.unidades_cache import UnidadesSnapshot
+
+
+HISTORY_SIZE = 32
+HASH_PREFIX = 8
+
+# ids só são únicos dentro de uma cidade
+RecordKey = Tuple[str, Any]
+RecordHashes = Dict[RecordKey, bytes]
+
+
+class SourceVersion(NamedTuple):
+    fonte: str
+    version: int
+    hash: str
+
+    def matches(self, version: int, h: str) -> bool:
+        return self.version == version and h.startswith(self.hash[:HASH_PREFIX])
+
+
+def record_key(u: Dict[str, Any]) -> RecordKey:
+    return (u.get("cidade") or "", u.get("id"))
+
+
+def _encode_record(u: Dict[str, Any]) -> bytes:
+    # chaves ordenadas: unidades lidas do SnapshotStore vêm com outra ordem de campos
+    if orjson is not None:
+        return orjson.dumps(u, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(u, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def record_hashes(unidades: List[Dict[str, Any]]) -> RecordHashes:
+    return {record_key(u): hashlib.sha256(_encode_record(u)).digest()[:8] for u in unidades}
+
+
+# -------------------------
+# token de versão
+# -------------------------
+def format_version(parts: Tuple[SourceVersion, ...]) -> str:
+    return ",".join(f"{p.fonte}:{p.version}:{p.hash[:HASH_PREFIX]}" for p in parts)
+
+
+def parse_version(token: Optional[str]) -> Dict[str, SourceVersion]:
+    """"quixada:12:ab12cd34,..." -> {fonte: SourceVersion}; None/"" -> {} (sem versão)."""
+    out: Dict[str, SourceVersion] = {}
+    for item in (token or "").split(","):
+        if not item:
+            continue
+        fonte, _, rest = item.partition(":")
+        version, _, h = rest.partition(":")
+        if not fonte or not version.isdigit() or len(h) != HASH_PREFIX:
+            raise ValueError("Versão inválida")
+        out[fonte] = SourceVersion(fonte, int(version), h)
+    return out
+
+
+# -------------------------
+# histórico por fonte
+# -------------------------
+class SnapshotHistory:
+    """Anel das últimas versões de uma fonte: versão -> (hash, hashes por unidade).
+
+    O snapshot atual fica inteiro; quando é substituído, sobra dele só o
+    mapa de hashes (poucos bytes por unidade).
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self.size = size
+        self._current: Optional["UnidadesSnapshot"] = None
+        self._entries: "OrderedDict[int, Tuple[str, RecordHashes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, snap: "UnidadesSnapshot") -> None:
+        with self._lock:
+            prev = self._current
+            self._current = snap
+            if prev is None or prev.version == snap.version:
+                return
+            self._entries[prev.version] = (prev.hash, prev.get_derived("record_hashes", record_hashes))
+            self._entries.pop(snap.version, None)
+            while len(self._entries) >= self.size:
+                self._entries.popitem(last=False)
+
+    def get(self, since: SourceVersion) -> Optional[RecordHashes]:
+        with self._lock:
+            current = self._current
+            entry = self._entries.get(since.version)
+        if current is not None and since.matches(current.version, current.hash):
+            return current.get_derived("record_hashes", record_hashes)
+        if entry is not None and since.matches(since.version, entry[0]):
+            return entry[1]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries) + (self._current is not None)
+
+
+# -------------------------
+# diff
+# -------------------------
+@dataclass
+class Changes:
+    versao: str
+    ressincronizar: bool = False
+    adicionadas: List[Dict[str, Any]] = field(default_factory=list)
+    modificadas: List[Dict[str, Any]] = field(default_factory=list)
+    removidas: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add_diff(self, old: RecordHashes, snap: "UnidadesSnapshot") -> None:
+        new = snap.get_derived("record_hashes", record_hashes)
+        for u in snap.unidades:
+            key = record_key(u)
+            prev = old.get(key)
+            if prev is None:
+                self.adicionadas.append(u)
+            elif prev != new[key]:
+                self.modificadas.append(u)
+        self.removidas.extend({"cidade": c, "id": i} for c, i in old if (c, i) not in new)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "versao": self.versao,
+            "ressincronizar": self.ressincronizar,
+            "adicionadas": self.adicionadas,
+            "modificadas": self.modificadas,
+            "removidas": self.removidas,
+        }
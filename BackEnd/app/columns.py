@@ -0,0 +1,127 @@
+"""
+Armazenamento em colunas do snapshot, para projeção (`fields=`), paginação
+por cursor e saída NDJSON de /api/unidades.
+
+Cada campo de cada unidade é serializado uma única vez, na montagem, como
+fragmento JSON (`"nome":"UBS ..."`). Uma resposta projetada é só a junção
+dos fragmentos pedidos, sem montar dicts por requisição.
+
+O cursor é keyset: guarda a chave de ordenação do último item entregue
+(`cidade` + `id`, precedidos da relevância quando há busca), então continua
+válido quando o snapshot muda entre uma página e outra.
+"""
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import base64
+import json
+
+from app.http_cache import dumps
+
+
+NDJSON_CHUNK_ROWS = 256
+
+SortKey = Tuple[float, ...]
+T = TypeVar("T")
+
+
+class UnidadesColumns:
+    def __init__(self, unidades: List[Dict[str, Any]]):
+        fields: Dict[str, None] = {}
+        for u in unidades:
+            for f in u:
+                fields.setdefault(f, None)
+        self.fields: Tuple[str, ...] = tuple(fields)
+
+        self.columns: Dict[str, List[Any]] = {f: [u.get(f) for u in unidades] for f in self.fields}
+        self.fragments: Dict[str, List[bytes]] = {
+            f: [dumps({f: v})[1:-1] for v in col] for f, col in self.columns.items()
+        }
+        # ids só são únicos dentro de uma cidade: a chave é (cidade, id)
+        cidades = self.columns.get("cidade") or [None] * len(unidades)
+        self.keys: List[Tuple[str, Any]] = [
+            (c or "", i) for c, i in zip(cidades, self.columns.get("id", [None] * len(unidades)))
+        ]
+        self.by_key: List[int] = sorted(range(len(unidades)), key=self.keys.__getitem__)
+
+    def parse_fields(self, fields: Optional[str]) -> Tuple[str, ...]:
+        """"nome,tipo" -> ("nome", "tipo"); None/"" -> todos os campos."""
+        if not fields:
+            return self.fields
+        out = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in out if f not in self.fragments]
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}")
+        return out
+
+    # -------------------------
+    # serialização
+    # -------------------------
+    def row(self, pos: int, fields: Sequence[str]) -> bytes:
+        frags = self.fragments
+        return b"{" + b",".join(frags[f][pos] for f in fields) + b"}"
+
+    def json_array(self, positions: Sequence[int], fields: Sequence[str]) -> bytes:
+        return b"[" + b",".join(self.row(pos, fields) for pos in positions) + b"]"
+
+    def ndjson_chunks(self, positions: Sequence[int], fields: Sequence[str]) -> Iterator[bytes]:
+        for start in range(0, len(positions), NDJSON_CHUNK_ROWS):
+            chunk = positions[start : start + NDJSON_CHUNK_ROWS]
+            yield b"".join(self.row(pos, fields) + b"\n" for pos in chunk)
+
+
+# -------------------------
+# cursor (keyset)
+# -------------------------
+def encode_cursor(key: SortKey) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(key, list) or not key:
+        raise ValueError("Cursor inválido")
+    return tuple(key)
+
+
+def check_cursor(cursor: str, sample: SortKey) -> SortKey:
+    """Decodifica o cursor e confere tamanho e tipos contra uma chave da listagem.
+
+    Barato (não percorre a listagem): roda antes do cache de payloads.
+    """
+    after = decode_cursor(cursor)
+    if len(after) != len(sample):
+        # cursor de uma listagem com outra ordenação (com/sem busca)
+        raise ValueError("Cursor inválido")
+    for a, b in zip(after, sample):
+        try:
+            a < b
+        except TypeError:
+            # tipos trocados (ex.: texto onde a chave é número)
+            raise ValueError("Cursor inválido")
+    return after
+
+
+def paginate(
+    items: Sequence[T],
+    key: Callable[[T], SortKey],
+    after: Optional[SortKey],
+    limit: Optional[int],
+) -> Tuple[List[T], Optional[str]]:
+    """Fatia `items` (ordenado por `key`) depois da chave `after`; devolve (página, próximo cursor)."""
+    start = 0
+    if after is not None:
+        try:
+            start = bisect_right(items, after, key=key)
+        except TypeError:
+            raise ValueError("Cursor inválido")
+
+    end = len(items) if limit is None else min(len(items), start + limit)
+    page = list(items[start:end])
+    next_cursor = encode_cursor(key(items[end - 1])) if end < len(items) and end > start else None
+    return page, next_cursor
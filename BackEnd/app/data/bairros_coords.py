@@ -0,0 +1,36 @@
+# Coordenadas usadas para posicionar as unidades sem geocodificador externo.
+# Os centroides são APROXIMADOS (centro de cada bairro/distrito de Quixadá);
+# quando a posição exata de uma unidade for conhecida, use COORD_OVERRIDES.
+# Chaves normalizadas: minúsculas, sem acento (ver app.search.normalize).
+
+BAIRRO_CENTROIDES = {
+    "centro": (-4.9713, -39.0154),
+    "campo velho": (-4.9795, -39.0205),
+    "combate": (-4.9648, -39.0231),
+    "planalto universitario": (-4.9790, -39.0560),
+    "alto sao francisco": (-4.9630, -39.0100),
+    "jardim monolitos": (-4.9585, -39.0265),
+    "jardim dos monolitos": (-4.9585, -39.0265),
+    "baviera": (-4.9760, -39.0075),
+    "putiu": (-4.9560, -39.0380),
+    "sao joao": (-4.9830, -39.0120),
+    "triangulo": (-4.9675, -39.0300),
+    "herval": (-4.9860, -39.0245),
+    "campo novo": (-4.9880, -39.0170),
+    "planalto renascer": (-4.9900, -39.0320),
+    "nova jerusalem": (-4.9540, -39.0180),
+    "vila campos": (-4.9700, -39.0050),
+    "alto da boa vista": (-4.9740, -39.0330),
+    # distritos
+    "juatama": (-4.8545, -38.9640),
+    "dom mauricio": (-4.8000, -39.0700),
+    "custodio": (-5.0500, -39.1700),
+    "california": (-4.9000, -38.9200),
+    "daniel de queiroz": (-5.1500, -39.0600),
+    "tapuiara": (-4.7900, -39.0100),
+    "cipo dos anjos": (-4.8900, -39.1900),
+    "jua": (-5.0700, -38.9500),
+}
+
+# id da unidade -> (lat, lon) conferidos manualmente
+COORD_OVERRIDES = {}
@@ -0,0 +1,188 @@
+"""
+Coordenadas das unidades e busca das mais próximas (/api/unidades/proximas).
+
+As coordenadas são resolvidas no momento do snapshot, pelo adaptador de
+cada cidade (Source.add_coords). Para Quixadá, sem geocodificador: primeiro
+COORD_OVERRIDES (por id), depois o centroide do bairro (campo `bairro` ou
+nome de bairro conhecido dentro do `endereco`).
+
+O índice espacial é uma KD-tree por `tipo` (mais uma com todas as unidades),
+montada uma vez por snapshot. Os pontos ficam em coordenadas cartesianas
+sobre a esfera unitária, onde a distância euclidiana cresce junto com a
+distância geodésica; a busca dos k vizinhos é O(log n + k).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+
+from app.data.bairros_coords import BAIRRO_CENTROIDES, COORD_OVERRIDES
+from app.search import normalize
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# nomes de bairro como palavras inteiras, o mais longo primeiro
+# ("jardim dos monolitos" antes de "centro", "juatama" antes de "jua")
+_BAIRRO_RE = re.compile(
+    r"\b(" + "|".join(re.escape(k) for k in sorted(BAIRRO_CENTROIDES, key=len, reverse=True)) + r")\b"
+)
+
+Point = Tuple[float, float, float]
+
+
+# -------------------------
+# coordenadas no snapshot
+# -------------------------
+def _bairro_key(u: Dict[str, Any]) -> Optional[str]:
+    bairro = normalize(u.get("bairro"))
+    if bairro in BAIRRO_CENTROIDES:
+        return bairro
+    endereco = normalize(u.get("endereco"))
+    if not endereco:
+        return None
+    # o bairro costuma vir depois do " - "; o nome da rua pode conter "centro" etc.
+    _, sep, tail = endereco.partition("-")
+    for text in ((tail, endereco) if sep else (endereco,)):
+        m = _BAIRRO_RE.search(text)
+        if m:
+            return m.group(1)
+    return None
+
+
+def resolve_coords(u: Dict[str, Any]) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(lat, lon, precisão) de uma unidade de Quixadá; precisão é "manual", "bairro" ou None."""
+    override = COORD_OVERRIDES.get(u.get("id"))
+    if override:
+        return override[0], override[1], "manual"
+    key = _bairro_key(u)
+    if key:
+        lat, lon = BAIRRO_CENTROIDES[key]
+        return lat, lon, "bairro"
+    return None, None, None
+
+
+def add_coords(unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for u in unidades:
+        u["lat"], u["lon"], u["coordPrecisao"] = resolve_coords(u)
+    return unidades
+
+
+# -------------------------
+# geometria
+# -------------------------
+def to_point(lat: float, lon: float) -> Point:
+    la, lo = math.radians(lat), math.radians(lon)
+    c = math.cos(la)
+    return (c * math.cos(lo), c * math.sin(lo), math.sin(la))
+
+
+def chord2_to_km(d2: float) -> float:
+    # corda ao quadrado na esfera unitária -> distância geodésica
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(d2) / 2))
+
+
+class KDTree:
+    """KD-tree estática em 3D, guardada em listas (nó i = mediana de uma fatia)."""
+
+    def __init__(self, points: Sequence[Point], items: Sequence[int]):
+        order = list(range(len(points)))
+        self.points: List[Point] = []
+        self.items: List[int] = []
+        self.axis: List[int] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.root = self._build(order, points, items, 0)
+
+    def _build(self, idx: List[int], points: Sequence[Point], items: Sequence[int], depth: int) -> int:
+        if not idx:
+            return -1
+        axis = depth % 3
+        idx.sort(key=lambda i: points[i][axis])
+        mid = len(idx) // 2
+
+        node = len(self.points)
+        self.points.append(points[idx[mid]])
+        self.items.append(items[idx[mid]])
+        self.axis.append(axis)
+        self.left.append(-1)
+        self.right.append(-1)
+
+        self.left[node] = self._build(idx[:mid], points, items, depth + 1)
+        self.right[node] = self._build(idx[mid + 1 :], points, items, depth + 1)
+        return node
+
+    def nearest(self, q: Point, k: int) -> List[Tuple[float, int]]:
+        """k itens mais próximos de q: lista de (distância² da corda, item), crescente."""
+        if self.root < 0 or k <= 0:
+            return []
+        best: List[Tuple[float, int]] = []  # max-heap via distância negativa
+        qx, qy, qz = q
+        # (nó, distância² mínima possível até a região do nó)
+        stack = [(self.root, 0.0)]
+        points, axis, left, right, items = self.points, self.axis, self.left, self.right, self.items
+
+        while stack:
+            node, bound = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            px, py, pz = p = points[node]
+            d2 = (px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2
+            if len(best) < k:
+                heapq.heappush(best, (-d2, items[node]))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, items[node]))
+
+            a = axis[node]
+            diff = q[a] - p[a]
+            near, far = (left[node], right[node]) if diff < 0 else (right[node], left[node])
+            # o lado de lá só é visitado se ainda puder ter alguém mais perto
+            if far >= 0:
+                stack.append((far, diff * diff))
+            if near >= 0:
+                stack.append((near, bound))
+
+        return sorted((-d, item) for d, item in best)
+
+
+class GeoIndex:
+    """KD-trees por tipo sobre as unidades com coordenadas de um snapshot.
+
+    Só entram unidades com `lat`/`lon` já resolvidos pela fonte: centroides de
+    bairro são por cidade, então não há fallback aqui.
+    """
+
+    def __init__(self, unidades: List[Dict[str, Any]]):
+        self.unidades = unidades
+        by_tipo: Dict[str, Tuple[List[Point], List[int]]] = {}
+        all_points: List[Point] = []
+        all_items: List[int] = []
+
+        for pos, u in enumerate(unidades):
+            lat, lon = u.get("lat"), u.get("lon")
+            if lat is None or lon is None:
+                continue
+            p = to_point(lat, lon)
+            all_points.append(p)
+            all_items.append(pos)
+            pts, its = by_tipo.setdefault(normalize(u.get("tipo")), ([], []))
+            pts.append(p)
+            its.append(pos)
+
+        self.trees: Dict[str, KDTree] = {t: KDTree(p, i) for t, (p, i) in by_tipo.items()}
+        self.all = KDTree(all_points, all_items)
+
+    def nearest(self, lat: float, lon: float, k: int, tipo: Optional[str] = None) -> List[Dict[str, Any]]:
+        tree = self.all
+        if tipo:
+            tree = self.trees.get(normalize(tipo))
+            if tree is None:
+                return []
+
+        out = []
+        for d2, pos in tree.nearest(to_point(lat, lon), k):
+            u = dict(self.unidades[pos])
+            u["distanciaKm"] = round(chord2_to_km(d2), 3)
+            out.append(u)
+        return out
@@ -0,0 +1,179 @@
+"""
+Respostas JSON pré-serializadas e pré-comprimidas.
+
+Cada payload é serializado uma vez por versão dos dados, já com as variantes
+gzip/brotli e um ETag forte. Requisições repetidas viram só uma escolha de
+bytes prontos (ou um 304 quando o cliente manda If-None-Match).
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+import gzip
+import hashlib
+import json
+import threading
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional
+    brotli = None
+
+
+# dados estáticos (sintomas/orientações) mudam só com deploy
+STATIC_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+# unidades mudam a cada refresh do scraping
+UNIDADES_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=3600"
+
+# abaixo disso a compressão não compensa
+MIN_COMPRESS_BYTES = 256
+# qualidade 11 custa ~20x mais CPU que a 9 para uns 8% a menos de bytes; como
+# variantes filtradas são serializadas no caminho da requisição, fica a 9
+BROTLI_QUALITY = 9
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    etag: str
+    variants: Dict[str, bytes]  # content-encoding ("identity", "gzip", "br") -> bytes
+
+    def etag_for(self, encoding: str) -> str:
+        # ETag forte: cada codificação tem bytes diferentes, então ETag diferente
+        if encoding == "identity":
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+def serialize(obj: Any) -> CachedPayload:
+    return payload_from_bytes(dumps(obj))
+
+
+def payload_from_bytes(body: bytes) -> CachedPayload:
+    variants = {"identity": body}
+
+    if len(body) >= MIN_COMPRESS_BYTES:
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            variants["gzip"] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=BROTLI_QUALITY)
+            if len(br) < len(body):
+                variants["br"] = br
+
+    return CachedPayload(etag=hashlib.sha256(body).hexdigest()[:32], variants=variants)
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.replace(" ", "")
+        if q.startswith("q=") and q[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(name)
+    return accepted
+
+
+def _choose_encoding(request: Request, payload: CachedPayload) -> str:
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    for encoding in ("br", "gzip"):
+        if encoding in payload.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def _etag_matches(if_none_match: str, payload: CachedPayload) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    known = {payload.etag_for(enc) for enc in payload.variants}
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in known:
+            return True
+    return False
+
+
+def cached_response(
+    request: Request,
+    payload: CachedPayload,
+    cache_control: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    encoding = _choose_encoding(request, payload)
+    out_headers = {
+        "ETag": payload.etag_for(encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if headers:
+        out_headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload):
+        return Response(status_code=304, headers=out_headers)
+
+    if encoding != "identity":
+        out_headers["Content-Encoding"] = encoding
+    return Response(
+        content=payload.variants[encoding],
+        media_type="application/json",
+        headers=out_headers,
+    )
+
+
+class PayloadLRU:
+    """LRU limitado de payloads serializados (ex.: variantes filtradas de /api/unidades)."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, CachedPayload]" = OrderedDict()
+        self._building: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], CachedPayload]) -> CachedPayload:
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is not None:
+                self._items.move_to_end(key)
+                return payload
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        # single-flight por chave: requisições simultâneas esperam a mesma
+        # serialização em vez de comprimir o mesmo payload N vezes
+        with key_lock:
+            try:
+                with self._lock:
+                    payload = self._items.get(key)
+                if payload is None:
+                    payload = build()
+                    with self._lock:
+                        self._items[key] = payload
+                        while len(self._items) > self.maxsize:
+                            self._items.popitem(last=False)
+            finally:
+                # build() pode falhar (ex.: cursor inválido): a trava da chave não fica para trás
+                with self._lock:
+                    self._building.pop(key, None)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
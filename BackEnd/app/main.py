@@ -1,20 +1,66 @@
-from typing import Optional, List, Dict, Any
-import time
-import re
-
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI, Query, HTTPException
+from contextlib import asynccontextmanager
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, List, Dict, Sequence, Tuple
+import asyncio
+import logging
+import os
+
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
 
 from app.data.sintomas import SINTOMAS
 from app.data.orientacoes import ORIENTACOES
+from app.columns import SortKey, UnidadesColumns, check_cursor, paginate
+from app.geo import GeoIndex
+from app import metrics
+from app.metrics import MetricsMiddleware, timed
+from app.http_cache import (
+    STATIC_CACHE_CONTROL,
+    UNIDADES_CACHE_CONTROL,
+    PayloadLRU,
+    cached_response,
+    dumps,
+    payload_from_bytes,
+    serialize,
+)
+from app.catalog import Catalog, UnknownCityError
+from app.changes import format_version
+from app.search import UnidadesIndex, normalize
+from app.seed import load_seed
+from app.snapshot_store import SnapshotStore
+from app.sources import QuixadaSource, Source
+from app.unidades_cache import CacheRead, UnidadesCache
+
+if TYPE_CHECKING:
+    from app.triagem import TriagemCompilada
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # snapshots em disco ou seeds (ms, sem rede); o scraping fica para os refreshers
+    catalog.preload()
+    # aquece os caches e renova antes de expirar, sem bloquear o startup
+    refresher = asyncio.create_task(catalog.run_refreshers())
+    # compila a triagem (numpy) depois do boot, fora do caminho da 1ª requisição
+    warmup = asyncio.create_task(asyncio.to_thread(get_triagem))
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        warmup.cancel()
 
 
 app = FastAPI(
     title="Guia Saúde API",
     version="1.0.0",
     description="API do trabalho final (FastAPI). Dados em JSON para o frontend.",
+    lifespan=lifespan,
 )
 
 # CORS – libera o frontend
@@ -22,10 +68,22 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://guia-saude-front-end.vercel.app"],
     allow_credentials=False,
-    allow_methods=["GET", "OPTIONS"],
+    allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    # headers lidos pelo frontend: idade do snapshot, catálogo parcial, versão e cursor do NDJSON
+    expose_headers=[
+        "Server-Timing",
+        "X-Snapshot-Age",
+        "X-Cache-Status",
+        "X-Cidades-Indisponiveis",
+        "X-Versao",
+        "X-Next-Cursor",
+    ],
 )
 
+# latência por rota + header Server-Timing (por último = mais externo)
+app.add_middleware(MetricsMiddleware)
+
 # -------------------------
 # SCRAPING CONFIG
 # -------------------------
@@ -34,119 +92,149 @@ DETAIL_URL = "https://quixada.ce.gov.br/unidadesaude.php?id={id}"
 HEADERS = {"User-Agent": "GuiaSaude-Academico/1.0"}
 
 CACHE_TTL_SECONDS = 6 * 60 * 60
-_unidades_cache: List[Dict[str, Any]] | None = None
-_cache_ts: float = 0.0
+CACHE_REFRESH_AHEAD_SECONDS = 30 * 60
+CACHE_RETRY_SECONDS = 60
+
+# snapshot compartilhado entre workers (e que sobrevive a restarts). É o
+# caminho base: um arquivo por fonte, unidades-<cidade>.sqlite3. O arquivo do
+# caminho exato é o formato de antes das várias cidades (só Quixadá) e é
+# importado uma vez para a primeira fonte (_import_legacy_snapshot).
+SNAPSHOT_DB_PATH = os.environ.get(
+    "GUIA_SAUDE_SNAPSHOT_DB",
+    str(Path(__file__).resolve().parents[1] / "var" / "unidades.sqlite3"),
+)
 
+# seed gerado no build por scripts/scrape_unidades.py (boot sem scraping);
+# um arquivo por fonte: unidades_seed-<cidade>.json.gz
+SEED_PATH = os.environ.get(
+    "GUIA_SAUDE_SEED",
+    str(Path(__file__).resolve().parent / "data" / "unidades_seed.json.gz"),
+)
 
-def _fetch_soup(url: str) -> BeautifulSoup:
-    r = requests.get(url, headers=HEADERS, timeout=25)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml")
+# quanto uma leitura combinada espera por fontes frias antes de responder sem elas
+COLD_SOURCE_WAIT_SECONDS = 30
 
+# -------------------------
+# FONTES (uma por prefeitura; requests/lxml só no primeiro scraping)
+# -------------------------
+SOURCES: List[Source] = [
+    QuixadaSource(list_url=LIST_URL, detail_url=DETAIL_URL, headers=HEADERS),
+]
 
-def _extract_bairro_from_endereco(endereco: Optional[str]) -> Optional[str]:
-    if not endereco:
-        return None
-    parts = [p.strip() for p in endereco.split("-") if p.strip()]
-    if len(parts) < 2:
-        return None
-    cand = parts[1].title()
-    if len(cand) < 3:
-        return None
-    return cand
-
-
-def _infer_tipo(nome: str, endereco: Optional[str], page_text: str) -> str:
-    hay = f"{nome} {endereco or ''} {page_text}".upper()
-
-    if "CAPS" in hay:
-        return "caps"
-    if "UPA" in hay:
-        return "upa"
-    if "HOSPITAL" in hay:
-        return "hospital"
-    if "UBS" in hay or "POSTO" in hay or "UNIDADE BASICA" in hay or "UNIDADE BÁSICA" in hay:
-        return "ubs"
-
-    return "ubs"
-
-
-def _scrape_list_unidades() -> List[Dict[str, Any]]:
-    soup = _fetch_soup(LIST_URL)
-    anchors = []
-
-    for a in soup.select('a[href*="unidadesaude.php?id="]'):
-        txt = a.get_text(" ", strip=True)
-        if txt and txt.upper() != "VISUALIZAR":
-            anchors.append(a)
-
-    unidades = []
-
-    for a in anchors:
-        href = a.get("href", "")
-        m = re.search(r"id=(\d+)", href)
-        if not m:
-            continue
-
-        uid = int(m.group(1))
-        nome = a.get_text(" ", strip=True)
-
-        texts = []
-        for el in a.next_elements:
-            if getattr(el, "name", None) == "a":
-                t = el.get_text(" ", strip=True)
-                h = el.get("href", "")
-                if t and t.upper() != "VISUALIZAR" and "unidadesaude.php?id=" in h:
-                    break
-            if isinstance(el, str):
-                t = el.strip()
-                if t:
-                    texts.append(re.sub(r"\s+", " ", t))
-
-        block = " ".join(texts)
-
-        endereco = next((t for t in texts if "RUA" in t.upper()), None)
-        horario = next((t for t in texts if "SEG" in t.upper() or "24" in t), None)
-        email = next((t for t in texts if "@" in t), None)
-
-        bairro = _extract_bairro_from_endereco(endereco)
-        tipo = _infer_tipo(nome, endereco, block)
-
-        unidades.append(
-            {
-                "id": uid,
-                "nome": nome,
-                "tipo": tipo,
-                "endereco": endereco,
-                "bairro": bairro,
-                "horario": horario,
-                "telefone": None,
-                "email": email,
-                "fonteUrl": DETAIL_URL.format(id=uid),
-            }
-        )
 
-    return unidades
+def _per_source_path(path: str, slug: str) -> Path:
+    # var/unidades.sqlite3 -> var/unidades-quixada.sqlite3
+    p = Path(path)
+    stem, dot, ext = p.name.partition(".")
+    return p.with_name(f"{stem}-{slug}{dot}{ext}")
+
+
+# fonte -> erro ao abrir o snapshot compartilhado (aparece em /api/health)
+snapshot_store_errors: Dict[str, str] = {}
+
 
+def _open_snapshot_store(slug: str) -> Optional[SnapshotStore]:
+    # sem disco gravável (ex.: ambiente serverless) o cache fica só em memória,
+    # um por worker: cada worker faz o seu scraping
+    path = _per_source_path(SNAPSHOT_DB_PATH, slug)
+    try:
+        return SnapshotStore(path)
+    except Exception as e:
+        snapshot_store_errors[slug] = f"{path}: {e}"
+        logger.warning("Snapshot compartilhado indisponível para %s (%s); cache só em memória neste worker", slug, snapshot_store_errors[slug])
+        return None
 
-def get_unidades_scraped() -> List[Dict[str, Any]]:
-    global _unidades_cache, _cache_ts
 
-    now = time.time()
-    if _unidades_cache and (now - _cache_ts) < CACHE_TTL_SECONDS:
-        return _unidades_cache
+def _import_legacy_snapshot(store: SnapshotStore, source: Source) -> None:
+    """Copia o último snapshot do arquivo antigo (sem `-<cidade>`) para o da fonte.
 
+    Só com o arquivo da fonte vazio: a primeira subida depois do deploy serve
+    o snapshot de antes, sem scraping. O arquivo antigo não é alterado.
+    """
+    legacy = Path(SNAPSHOT_DB_PATH)
+    if not legacy.is_file() or store.latest_meta() is not None:
+        return
     try:
-        unidades = _scrape_list_unidades()
-        if len(unidades) < 10:
-            raise RuntimeError("Poucas unidades retornadas no scraping")
+        stored = SnapshotStore(legacy).latest()
+        if stored is not None:
+            # snapshots antigos não têm `cidade`
+            store.save(source.prepare(stored.unidades), ts=stored.ts)
+    except Exception as e:
+        logger.warning("Snapshot antigo %s não importado para %s: %s", legacy, source.slug, e)
 
-        _unidades_cache = unidades
-        _cache_ts = now
-        return unidades
 
+def _load_source_seed(source: Source):
+    seed = load_seed(_per_source_path(SEED_PATH, source.slug))
+    return (source.tag(seed[0]), seed[1]) if seed else None
+
+
+def _make_cache(source: Source) -> UnidadesCache:
+    store = _open_snapshot_store(source.slug)
+    if store is not None and source is SOURCES[0]:
+        _import_legacy_snapshot(store, source)
+    return UnidadesCache(
+        loader=source.load,
+        ttl=CACHE_TTL_SECONDS,
+        refresh_ahead=CACHE_REFRESH_AHEAD_SECONDS,
+        retry_interval=CACHE_RETRY_SECONDS,
+        store=store,
+        seed=lambda: _load_source_seed(source),
+        name=source.slug,
+    )
+
+
+catalog = Catalog({s.slug: _make_cache(s) for s in SOURCES}, cold_wait=COLD_SOURCE_WAIT_SECONDS)
+
+
+def get_unidades_read(cidade: Optional[str] = None) -> CacheRead:
+    try:
+        with timed("cache"):
+            return catalog.read(cidade)
+    except UnknownCityError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Erro no scraping: {e}")
+        # só acontece com a fonte fria: não há cópia antiga para servir
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _snapshot_headers(read: CacheRead) -> Dict[str, str]:
+    headers = {
+        "X-Snapshot-Age": str(int(read.snapshot.age)),
+        "X-Cache-Status": "stale" if read.stale else "fresh",
+        # token para /api/unidades/changes?since=
+        "X-Versao": format_version(read.versions),
+    }
+    if read.missing:
+        # catálogo parcial: cidades fora do ar ou ainda carregando
+        headers["X-Cidades-Indisponiveis"] = ",".join(read.missing)
+        headers["Cache-Control"] = "no-cache"
+    return headers
+
+
+# payloads serializados: estáticos uma vez; unidades por (snapshot, tipo, q)
+_SINTOMAS_PAYLOAD = serialize(SINTOMAS)
+_ORIENTACOES_PAYLOAD = serialize(ORIENTACOES)
+unidades_payloads = PayloadLRU(maxsize=256)
+MAX_PAGE_SIZE = 500
+
+MAX_TRIAGEM_LOTE = 50_000
+_triagem: Optional["TriagemCompilada"] = None
+
+
+def get_triagem() -> "TriagemCompilada":
+    # catálogo compilado uma vez (índice de sintomas + matriz de pesos), na
+    # primeira triagem: o numpy fica fora do import da aplicação
+    global _triagem
+    if _triagem is None:
+        from app.triagem import TriagemCompilada
+
+        _triagem = TriagemCompilada(SINTOMAS, ORIENTACOES)
+    return _triagem
+
+
+class TriagemRequest(BaseModel):
+    sintomas: Optional[List[str]] = None
+    lotes: Optional[List[List[str]]] = None
 
 
 # -------------------------
@@ -159,36 +247,264 @@ def root():
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok"}
+    fontes = {}
+    for source in SOURCES:
+        cache = catalog.caches[source.slug]
+        snap = cache.snapshot
+        fontes[source.slug] = {
+            "nome": source.nome,
+            "carregadas": snap is not None,
+            "versao": snap.version if snap else None,
+            "idadeSegundos": int(snap.age) if snap else None,
+            "ultimoErro": cache.last_error,
+            "snapshotCompartilhado": cache.store is not None,
+            "erroSnapshot": snapshot_store_errors.get(source.slug),
+            "upstream": source.circuit_status(),
+        }
+    loaded = [f for f in fontes.values() if f["carregadas"]]
+    return {
+        "status": "ok",
+        "unidades": {
+            "carregadas": bool(loaded),
+            "idadeSegundos": max((f["idadeSegundos"] for f in loaded), default=None),
+            "ultimoErro": next((f["ultimoErro"] for f in fontes.values() if f["ultimoErro"]), None),
+            "snapshotCompartilhado": all(f["snapshotCompartilhado"] for f in fontes.values()),
+        },
+        "fontes": fontes,
+    }
+
+
+@app.get("/api/metrics", include_in_schema=False)
+def obter_metricas():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+if metrics.PROFILER_ENABLED:
+
+    @app.get("/api/metrics/profile", include_in_schema=False)
+    def obter_perfil(seconds: float = Query(default=10.0, gt=0, le=60)):
+        # perfila só o worker que recebeu a requisição
+        try:
+            return PlainTextResponse(metrics.profiler.profile(seconds))
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
 
 
 @app.get("/api/sintomas")
-def listar_sintomas():
-    return SINTOMAS
+def listar_sintomas(request: Request):
+    return cached_response(request, _SINTOMAS_PAYLOAD, STATIC_CACHE_CONTROL)
 
 
 @app.get("/api/orientacoes")
-def obter_orientacoes():
-    return ORIENTACOES
+def obter_orientacoes(request: Request):
+    return cached_response(request, _ORIENTACOES_PAYLOAD, STATIC_CACHE_CONTROL)
+
+
+@app.post("/api/triagem")
+def avaliar_triagem(body: TriagemRequest):
+    if (body.sintomas is None) == (body.lotes is None):
+        raise HTTPException(status_code=422, detail="Informe 'sintomas' ou 'lotes'")
+
+    triagem = get_triagem()
+    if body.sintomas is not None:
+        return Response(content=dumps(triagem.avaliar(body.sintomas)), media_type="application/json")
+
+    if len(body.lotes) > MAX_TRIAGEM_LOTE:
+        raise HTTPException(status_code=413, detail=f"No máximo {MAX_TRIAGEM_LOTE} listas por requisição")
+    resultados = triagem.avaliar_lote(body.lotes)
+    return Response(content=dumps({"resultados": resultados}), media_type="application/json")
+
+
+@app.get("/api/unidades/proximas")
+def unidades_proximas(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    k: int = Query(default=5, ge=1, le=50),
+    tipo: Optional[str] = Query(default=None),
+    cidade: Optional[str] = Query(default=None),
+):
+    read = get_unidades_read(cidade)
+    with timed("search"):
+        proximas = read.snapshot.get_derived("geo", GeoIndex).nearest(lat, lon, k, tipo)
+    with timed("serialize"):
+        body = dumps(proximas)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=_snapshot_headers(read),
+    )
+
+
+@app.get("/api/unidades/changes")
+def mudancas_unidades(
+    request: Request,
+    since: Optional[str] = Query(default=None, description="`versao` da última sincronização; sem ela, catálogo inteiro"),
+    cidade: Optional[str] = Query(default=None),
+):
+    try:
+        with timed("cache"):
+            read, changes = catalog.changes(cidade, since)
+    except UnknownCityError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if changes.ressincronizar:
+        result, key = "resync", ("changes", changes.versao)
+    else:
+        empty = not (changes.adicionadas or changes.modificadas or changes.removidas)
+        result, key = "empty" if empty else "diff", ("changes", changes.versao, since)
+    metrics.UNIDADES_CHANGES.inc(result=result)
+
+    def build():
+        with timed("serialize"):
+            return serialize(changes.as_dict())
+
+    payload = unidades_payloads.get_or_build(key, build)
+    headers = {**_snapshot_headers(read), "X-Versao": changes.versao}
+    return cached_response(request, payload, UNIDADES_CACHE_CONTROL, headers)
+
+
+def _listing_positions(snap, tipo_norm: str, q_norm: str) -> Sequence[int]:
+    """Posições na mesma ordem de UnidadesIndex.search (listagem sem paginação)."""
+    index = snap.get_derived("search", UnidadesIndex)
+    if q_norm:
+        return [pos for _, pos in index.search_ranked(q_norm, tipo_norm)]
+    if tipo_norm:
+        return index.by_tipo.get(tipo_norm, [])
+    return range(len(snap.unidades))
+
+
+def _ordered_positions(snap, tipo_norm: str) -> Sequence[int]:
+    """Posições em ordem de (cidade, id), só do tipo pedido; uma lista por snapshot e tipo."""
+    columns = snap.get_derived("columns", UnidadesColumns)
+    if not tipo_norm:
+        return columns.by_key
+    allowed = snap.get_derived("search", UnidadesIndex).tipo_sets.get(tipo_norm)
+    if allowed is None:
+        return []
+    return snap.get_derived(f"by_key:{tipo_norm}", lambda _: [pos for pos in columns.by_key if pos in allowed])
+
+
+def _ranked_positions(snap, tipo_norm: str, q_norm: str) -> List[Tuple[Tuple[float, ...], int]]:
+    """(chave de ordenação, posição) da busca: relevância + (cidade, id)."""
+    keys = snap.get_derived("columns", UnidadesColumns).keys
+    ranked = snap.get_derived("search", UnidadesIndex).search_ranked(q_norm, tipo_norm)
+    return sorted(((-score, *keys[pos]), pos) for score, pos in ranked)
+
+
+def _parse_cursor(snap, q_norm: str, cursor: Optional[str]) -> Optional[SortKey]:
+    """Cursor conferido sem montar a listagem: 3 campos com busca, 2 sem."""
+    if not cursor:
+        return None
+    keys = snap.get_derived("columns", UnidadesColumns).keys
+    sample = keys[0] if keys else ("", 0)
+    return check_cursor(cursor, (0.0, *sample) if q_norm else sample)
+
+
+def _page(snap, tipo_norm: str, q_norm: str, after: Optional[SortKey], limit: Optional[int]) -> Tuple[List[int], Optional[str]]:
+    if q_norm:
+        ranked, next_cursor = paginate(_ranked_positions(snap, tipo_norm, q_norm), itemgetter(0), after, limit)
+        return [pos for _, pos in ranked], next_cursor
+    # sem busca: bisect direto na ordem por (cidade, id), sem lista de chaves por requisição
+    keys = snap.get_derived("columns", UnidadesColumns).keys
+    return paginate(_ordered_positions(snap, tipo_norm), keys.__getitem__, after, limit)
 
 
 @app.get("/api/unidades")
 def listar_unidades(
+    request: Request,
     tipo: Optional[str] = Query(default=None),
     q: Optional[str] = Query(default=None),
+    cidade: Optional[str] = Query(default=None, description="slug da cidade (ex.: quixada); sem ela, todas"),
+    fields: Optional[str] = Query(default=None, description="campos separados por vírgula"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(default=None),
+    formato: Optional[str] = Query(default=None, pattern="^(json|ndjson)$"),
 ):
-    results = get_unidades_scraped()
+    read = get_unidades_read(cidade)
+    snap = read.snapshot
+    tipo_norm, q_norm = normalize(tipo), normalize(q)
 
-    if tipo:
-        tipo_norm = tipo.lower()
-        results = [u for u in results if u.get("tipo") == tipo_norm]
+    if formato == "ndjson":
+        return _listar_unidades_ndjson(read, tipo_norm, q_norm, fields, limit, cursor)
 
-    if q:
-        qn = q.lower()
-        results = [
-            u
-            for u in results
-            if qn in f"{u.get('nome','')} {u.get('bairro','')} {u.get('endereco','')}".lower()
-        ]
+    if fields is None and limit is None and cursor is None:
+        def build_full():
+            with timed("search"):
+                found = snap.get_derived("search", UnidadesIndex).search(q=q_norm, tipo=tipo_norm)
+            with timed("serialize"):
+                return serialize(found)
 
-    return results
+        payload = unidades_payloads.get_or_build((snap.hash, tipo_norm, q_norm), build_full)
+        return cached_response(request, payload, UNIDADES_CACHE_CONTROL, _snapshot_headers(read))
+
+    columns = snap.get_derived("columns", UnidadesColumns)
+    try:
+        field_list = columns.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if limit is None and cursor is None:
+        def build():
+            # só projeção: mesma ordem da listagem completa
+            with timed("search"):
+                positions = _listing_positions(snap, tipo_norm, q_norm)
+            with timed("serialize"):
+                return payload_from_bytes(columns.json_array(positions, field_list))
+
+        payload = unidades_payloads.get_or_build((snap.hash, tipo_norm, q_norm, field_list), build)
+        return cached_response(request, payload, UNIDADES_CACHE_CONTROL, _snapshot_headers(read))
+
+    # cursor conferido antes do cache: um 422 não chega a ocupar uma chave do LRU
+    try:
+        after = _parse_cursor(snap, q_norm, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    def build_page():
+        with timed("search"):
+            positions, next_cursor = _page(snap, tipo_norm, q_norm, after, limit)
+        with timed("serialize"):
+            return payload_from_bytes(
+                b'{"itens":' + columns.json_array(positions, field_list)
+                + b',"proximoCursor":' + dumps(next_cursor) + b"}"
+            )
+
+    try:
+        payload = unidades_payloads.get_or_build(
+            (snap.hash, tipo_norm, q_norm, field_list, limit, cursor), build_page
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return cached_response(request, payload, UNIDADES_CACHE_CONTROL, _snapshot_headers(read))
+
+
+def _listar_unidades_ndjson(
+    read: CacheRead,
+    tipo_norm: str,
+    q_norm: str,
+    fields: Optional[str],
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> StreamingResponse:
+    snap = read.snapshot
+    columns = snap.get_derived("columns", UnidadesColumns)
+    try:
+        field_list = columns.parse_fields(fields)
+        after = _parse_cursor(snap, q_norm, cursor)
+        with timed("search"):
+            positions, next_cursor = _page(snap, tipo_norm, q_norm, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    headers = _snapshot_headers(read)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return StreamingResponse(
+        columns.ndjson_chunks(positions, field_list),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
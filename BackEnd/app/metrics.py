@@ -0,0 +1,255 @@
+"""
+Métricas em formato Prometheus (/api/metrics) e instrumentação do caminho quente.
+
+Leve o bastante para ficar ligado em produção: histogramas com buckets
+pré-alocados, contadores simples e nenhum lock no caminho da requisição
+(sob o GIL, um incremento perdido numa corrida rara é aceitável para
+métricas).
+
+- `MetricsMiddleware` (ASGI puro) mede a latência por rota e devolve o
+  header `Server-Timing` com as etapas registradas via `timed()`;
+- `SamplingProfiler` é um profiler por amostragem opcional, ligado só
+  quando GUIA_SAUDE_PROFILER=1, para inspecionar um único worker.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import os
+import sys
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 5e6)
+COUNT_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 5000, 10000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, v in sorted(self.values.items()):
+            lines.append(f"{self.name}{_fmt_labels(labels)} {_fmt_value(v)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels: str) -> None:
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, n: int):
+        self.counts = [0] * (n + 1)  # último = +Inf
+        self.sum = 0.0
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series: Dict[Labels, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        s = self.series.get(key)
+        if s is None:
+            s = self.series.setdefault(key, _HistogramSeries(len(self.buckets)))
+        s.counts[bisect_left(self.buckets, value)] += 1
+        s.sum += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (float("inf"),)
+        for labels, s in sorted(self.series.items()):
+            acc = 0
+            for bound, count in zip(bounds, s.counts):
+                acc += count
+                lines.append(f"{self.name}_bucket{_fmt_labels(labels, ('le', _fmt_value(bound)))} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(labels)} {_fmt_value(s.sum)}")
+            lines.append(f"{self.name}_count{_fmt_labels(labels)} {acc}")
+        return lines
+
+
+# -------------------------
+# métricas da aplicação
+# -------------------------
+REQUEST_LATENCY = Histogram("guia_http_request_duration_seconds", "Latência das requisições por rota.")
+UNIDADES_CACHE = Counter("guia_unidades_cache_total", "Leituras do cache de unidades por resultado (hit/stale/miss).")
+UNIDADES_REFRESH = Counter("guia_unidades_refresh_total", "Refreshes do snapshot de unidades por resultado.")
+UNIDADES_CHANGES = Counter("guia_unidades_changes_total", "Respostas do feed de mudanças por resultado (diff/empty/resync).")
+SNAPSHOT_AGE = Gauge("guia_unidades_snapshot_age_seconds", "Idade do snapshot de unidades servido.")
+UPSTREAM_LATENCY = Histogram("guia_upstream_fetch_duration_seconds", "Duração das requisições ao site da prefeitura.")
+UPSTREAM_BYTES = Histogram("guia_upstream_fetch_bytes", "Tamanho das respostas do site da prefeitura.", BYTES_BUCKETS)
+UPSTREAM_STATUS = Counter("guia_upstream_fetch_total", "Requisições ao site da prefeitura por status.")
+UPSTREAM_RETRIES = Counter("guia_upstream_retries_total", "Retentativas de requisições ao site da prefeitura.")
+UPSTREAM_CIRCUIT = Gauge("guia_upstream_circuit_open", "1 enquanto o circuit breaker do upstream está aberto.")
+PARSE_LATENCY = Histogram("guia_scrape_parse_duration_seconds", "Duração do parse da listagem de unidades.")
+PARSE_UNITS = Histogram("guia_scrape_units", "Unidades extraídas por scraping.", COUNT_BUCKETS)
+
+REGISTRY = [
+    REQUEST_LATENCY,
+    UNIDADES_CACHE,
+    UNIDADES_REFRESH,
+    UNIDADES_CHANGES,
+    SNAPSHOT_AGE,
+    UPSTREAM_LATENCY,
+    UPSTREAM_BYTES,
+    UPSTREAM_STATUS,
+    UPSTREAM_RETRIES,
+    UPSTREAM_CIRCUIT,
+    PARSE_LATENCY,
+    PARSE_UNITS,
+]
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Server-Timing
+# -------------------------
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("guia_server_timing", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Registra a duração de uma etapa no Server-Timing da requisição atual."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, time.perf_counter() - t0))
+
+
+def _server_timing(timings: List[Tuple[str, float]], total: float) -> bytes:
+    parts = [f"{name};dur={dur * 1000:.2f}" for name, dur in timings]
+    parts.append(f"app;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", _server_timing(timings, time.perf_counter() - t0)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - t0,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=f"{status // 100}xx",
+            )
+
+
+# -------------------------
+# profiler por amostragem (opcional)
+# -------------------------
+PROFILER_ENABLED = os.environ.get("GUIA_SAUDE_PROFILER") == "1"
+
+
+class SamplingProfiler:
+    """Amostra as pilhas de todas as threads deste processo a cada `interval` s.
+
+    Saída em formato "collapsed" (uma pilha por linha, `f1;f2;f3 N`), pronta
+    para flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float) -> str:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Profiler já está rodando neste worker")
+        try:
+            return self._run(seconds)
+        finally:
+            self._lock.release()
+
+    def _run(self, seconds: float) -> str:
+        me = threading.get_ident()
+        stacks: Dict[str, int] = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                names = []
+                f = frame
+                while f is not None:
+                    code = f.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{f.f_lineno})")
+                    f = f.f_back
+                key = ";".join(reversed(names))
+                stacks[key] = stacks.get(key, 0) + 1
+            time.sleep(self.interval)
+        return "".join(f"{k} {v}\n" for k, v in sorted(stacks.items(), key=lambda kv: -kv[1]))
+
+
+profiler = SamplingProfiler()
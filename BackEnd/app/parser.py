@@ -0,0 +1,163 @@
+"""
+Extração das unidades a partir da página de listagem (unidadesaude.php).
+
+O parser antigo caminhava `a.next_elements` a partir de cada link de unidade
+até achar o próximo, o que é quadrático no tamanho da página. Aqui a página
+é percorrida uma única vez (eventos do lxml), cortando o texto em blocos a
+cada link de unidade. As heurísticas de campo são as mesmas, aplicadas com
+o texto de cada trecho já em maiúsculas uma única vez.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+from lxml import etree
+
+
+UNIT_HREF = "unidadesaude.php?id="
+
+_ID = re.compile(r"id=(\d+)")
+_SPACES = re.compile(r"\s+")
+
+# campo -> trechos que identificam o texto (procurados no texto em maiúsculas);
+# vale o primeiro texto do bloco que casar
+FIELD_MATCHERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("endereco", ("RUA",)),
+    ("horario", ("SEG", "24")),
+    ("email", ("@",)),
+)
+
+# ordem importa: CAPS antes de UPA, que vem antes de HOSPITAL...
+TIPO_MATCHERS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("caps", ("CAPS",)),
+    ("upa", ("UPA",)),
+    ("hospital", ("HOSPITAL",)),
+    ("ubs", ("UBS", "POSTO", "UNIDADE BASICA", "UNIDADE BÁSICA")),
+)
+
+
+def extract_bairro_from_endereco(endereco: Optional[str]) -> Optional[str]:
+    if not endereco:
+        return None
+    parts = [p.strip() for p in endereco.split("-") if p.strip()]
+    if len(parts) < 2:
+        return None
+    cand = parts[1].title()
+    if len(cand) < 3:
+        return None
+    return cand
+
+
+def infer_tipo_upper(hay: str) -> str:
+    """Como `infer_tipo`, mas recebe o texto já em maiúsculas."""
+    for tipo, needles in TIPO_MATCHERS:
+        for needle in needles:
+            if needle in hay:
+                return tipo
+    return "ubs"
+
+
+def infer_tipo(nome: str, endereco: Optional[str], page_text: str) -> str:
+    return infer_tipo_upper(f"{nome} {endereco or ''} {page_text}".upper())
+
+
+def _anchor_text(a: etree._Element) -> str:
+    # equivalente a BeautifulSoup.get_text(" ", strip=True) (sem comentários)
+    return " ".join(t for t in (s.strip() for s in a.itertext()) if t)
+
+
+def _unit_anchor_text(el: etree._Element) -> Optional[str]:
+    """Texto do link se `el` for um link de unidade (marca início de bloco)."""
+    if el.tag != "a":
+        return None
+    if UNIT_HREF not in (el.get("href") or ""):
+        return None
+    txt = _anchor_text(el)
+    if not txt or txt.upper() == "VISUALIZAR":
+        return None
+    return txt
+
+
+class _Block:
+    __slots__ = ("uid", "nome", "texts", "uppers")
+
+    def __init__(self, uid: Optional[int], nome: str):
+        self.uid = uid
+        self.nome = nome
+        self.texts: List[str] = []
+        self.uppers: List[str] = []
+
+    def add(self, raw: Optional[str]) -> None:
+        if not raw:
+            return
+        t = raw.strip()
+        if t:
+            t = _SPACES.sub(" ", t)
+            self.texts.append(t)
+            self.uppers.append(t.upper())
+
+
+def _build_unit(block: _Block, detail_url: str) -> Dict[str, Any]:
+    found: Dict[str, Optional[int]] = {name: None for name, _ in FIELD_MATCHERS}
+    pending = len(found)
+    for i, up in enumerate(block.uppers):
+        for name, needles in FIELD_MATCHERS:
+            if found[name] is None and any(n in up for n in needles):
+                found[name] = i
+                pending -= 1
+        if not pending:
+            break
+
+    def field(name: str) -> Optional[str]:
+        i = found[name]
+        return block.texts[i] if i is not None else None
+
+    endereco = field("endereco")
+    endereco_up = block.uppers[found["endereco"]] if found["endereco"] is not None else ""
+    hay = f"{block.nome.upper()} {endereco_up} {' '.join(block.uppers)}"
+
+    return {
+        "id": block.uid,
+        "nome": block.nome,
+        "tipo": infer_tipo_upper(hay),
+        "endereco": endereco,
+        "bairro": extract_bairro_from_endereco(endereco),
+        "horario": field("horario"),
+        "telefone": None,
+        "email": field("email"),
+        "fonteUrl": detail_url.format(id=block.uid),
+    }
+
+
+def parse_list_unidades(html: str | bytes, detail_url: str) -> List[Dict[str, Any]]:
+    root = etree.HTML(html)
+    if root is None:
+        return []
+
+    blocks: List[_Block] = []
+    current: Optional[_Block] = None
+
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            nome = _unit_anchor_text(el)
+            if nome is not None:
+                m = _ID.search(el.get("href") or "")
+                current = _Block(int(m.group(1)) if m else None, nome)
+                blocks.append(current)
+            if current is not None:
+                current.add(el.text)
+        elif event == "end":
+            if current is not None:
+                current.add(el.tail)
+        elif current is not None:
+            # comentário / processing instruction: não gera "end"
+            current.add(el.text)
+            current.add(el.tail)
+
+    # comentários depois de </html>
+    if current is not None:
+        for el in root.itersiblings():
+            current.add(el.text)
+            current.add(el.tail)
+
+    return [_build_unit(b, detail_url) for b in blocks if b.uid is not None]
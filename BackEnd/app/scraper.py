@@ -0,0 +1,74 @@
+"""
+Busca da página de listagem de um site de prefeitura.
+
+A pilha de scraping (requests via app.upstream, lxml via app.parser) só é
+importada quando o primeiro scraping roda. Importar este módulo, e portanto
+app.main, não a carrega: o worker sobe servindo o snapshot em disco ou o
+seed e faz o scraping depois, em background.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import threading
+import time
+
+from app.metrics import PARSE_LATENCY, PARSE_UNITS
+
+if TYPE_CHECKING:
+    from app.upstream import UpstreamClient, Validators
+
+
+class ListScraper:
+    def __init__(
+        self,
+        headers: Dict[str, str],
+        name: str = "",
+        rate: Optional[float] = None,
+        burst: int = 1,
+    ):
+        self.headers = headers
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._client: Optional["UpstreamClient"] = None
+        self._client_lock = threading.Lock()
+        # última listagem processada: (validadores HTTP, hash do HTML, unidades)
+        self._last: Optional[Tuple["Validators", str, List[Dict[str, Any]]]] = None
+
+    @property
+    def client(self) -> "UpstreamClient":
+        # conexões keep-alive, retentativas, circuit breaker e limite de taxa do site
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from app.upstream import UpstreamClient
+
+                    self._client = UpstreamClient(
+                        headers=self.headers, rate=self.rate, burst=self.burst, name=self.name
+                    )
+        return self._client
+
+    def circuit_status(self) -> Dict[str, Any]:
+        breaker = self._client.breaker if self._client is not None else None
+        return {
+            "circuitoAberto": breaker.is_open if breaker else False,
+            "novaTentativaEmSegundos": int(breaker.retry_in()) if breaker else 0,
+        }
+
+    def scrape(self, list_url: str, parse: Callable[[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        last = self._last
+        resp = self.client.fetch(list_url, validators=last[0] if last else None)
+        if resp.not_modified and last:
+            return last[2]
+
+        # o site pode não mandar ETag/Last-Modified: HTML idêntico também pula o parse
+        page_hash = hashlib.sha256(resp.text.encode("utf-8")).hexdigest()
+        if last and last[1] == page_hash:
+            unidades = last[2]
+        else:
+            t0 = time.perf_counter()
+            unidades = parse(resp.text)
+            PARSE_LATENCY.observe(time.perf_counter() - t0, fonte=self.name)
+            PARSE_UNITS.observe(len(unidades), fonte=self.name)
+        self._last = (resp.validators, page_hash, unidades)
+        return unidades
@@ -0,0 +1,203 @@
+"""
+Índice de busca das unidades (/api/unidades?q=).
+
+Montado uma vez por snapshot, com os campos já normalizados (casefold e
+sem acentos: "basica" encontra "BÁSICA"):
+
+- partição por tipo (posições já separadas por `tipo`);
+- índice invertido de tokens (e lista ordenada para busca por prefixo);
+- postings de trigramas do texto, para achar substrings intersectando
+  listas em vez de varrer o catálogo;
+- trigramas por token, para tolerar erros de digitação quando a busca
+  exata não encontra nada.
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import re
+import unicodedata
+
+
+SEARCH_FIELDS = ("nome", "bairro", "endereco")
+# peso de cada campo no ranking (nome conta mais que endereço)
+FIELD_WEIGHTS = (4, 2, 1)
+FUZZY_MIN_SIMILARITY = 0.45
+
+_SPACES = re.compile(r"\s+")
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", text).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _token_trigrams(token: str) -> Set[str]:
+    return _trigrams(f"${token}$")
+
+
+def _intersect(postings: Iterable[FrozenSet[int]]) -> Set[int]:
+    postings = sorted(postings, key=len)
+    if not postings:
+        return set()
+    result = set(postings[0])
+    for p in postings[1:]:
+        if not result:
+            break
+        result &= p
+    return result
+
+
+class UnidadesIndex:
+    def __init__(self, unidades: List[Dict[str, Any]]):
+        self.unidades = unidades
+
+        # campos normalizados por posição; None vira "" (e não o texto "none")
+        self.fields: List[Tuple[str, ...]] = [
+            tuple(normalize(u.get(f)) for f in SEARCH_FIELDS) for u in unidades
+        ]
+        self.haystacks: List[str] = [" ".join(f for f in fields if f) for fields in self.fields]
+
+        by_tipo: Dict[str, List[int]] = {}
+        for pos, u in enumerate(unidades):
+            by_tipo.setdefault(normalize(u.get("tipo")), []).append(pos)
+        self.by_tipo: Dict[str, List[int]] = by_tipo
+        self.tipo_sets: Dict[str, FrozenSet[int]] = {t: frozenset(p) for t, p in by_tipo.items()}
+
+        tokens: Dict[str, Set[int]] = {}
+        trigrams: Dict[str, Set[int]] = {}
+        for pos, hay in enumerate(self.haystacks):
+            for tok in _TOKEN.findall(hay):
+                tokens.setdefault(tok, set()).add(pos)
+            for tri in _trigrams(hay):
+                trigrams.setdefault(tri, set()).add(pos)
+
+        self.tokens: Dict[str, FrozenSet[int]] = {t: frozenset(p) for t, p in tokens.items()}
+        self.sorted_tokens: List[str] = sorted(self.tokens)
+        self.trigrams: Dict[str, FrozenSet[int]] = {t: frozenset(p) for t, p in trigrams.items()}
+
+        token_tris: Dict[str, Set[str]] = {}
+        self.token_trigram_count: Dict[str, int] = {}
+        for tok in self.tokens:
+            tris = _token_trigrams(tok)
+            self.token_trigram_count[tok] = len(tris)
+            for tri in tris:
+                token_tris.setdefault(tri, set()).add(tok)
+        self.token_trigrams: Dict[str, FrozenSet[str]] = {t: frozenset(v) for t, v in token_tris.items()}
+
+    # -------------------------
+    # busca
+    # -------------------------
+    def search(self, q: Optional[str] = None, tipo: Optional[str] = None) -> List[Dict[str, Any]]:
+        tipo_norm = normalize(tipo) if tipo else ""
+        qn = normalize(q) if q else ""
+
+        if not qn:
+            if not tipo_norm:
+                return self.unidades
+            return [self.unidades[pos] for pos in self.by_tipo.get(tipo_norm, ())]
+
+        return [self.unidades[pos] for _, pos in self.search_ranked(qn, tipo_norm)]
+
+    def search_ranked(self, q: str, tipo: Optional[str] = None) -> List[Tuple[float, int]]:
+        """(score, posição) das unidades que casam com q, da mais relevante para a menos."""
+        qn = normalize(q)
+        tipo_norm = normalize(tipo) if tipo else ""
+        if not qn:
+            return []
+        allowed = self.tipo_sets.get(tipo_norm, frozenset()) if tipo_norm else None
+
+        scored = self._search_exact(qn, allowed)
+        if not scored and len(qn) >= 3:
+            scored = self._search_fuzzy(qn, allowed)
+
+        return sorted(((score, pos) for pos, score in scored.items()), key=lambda item: (-item[0], item[1]))
+
+    def _search_exact(self, qn: str, allowed: Optional[FrozenSet[int]]) -> Dict[int, float]:
+        if len(qn) >= 3:
+            postings = [self.trigrams.get(tri, frozenset()) for tri in _trigrams(qn)]
+            candidates = _intersect(postings)
+            hits = [pos for pos in candidates if qn in self.haystacks[pos]]
+        else:
+            # consultas curtas demais para trigramas: prefixo de token
+            hits = self._prefix_postings(qn)
+
+        scores: Dict[int, float] = {}
+        for pos in hits:
+            if allowed is not None and pos not in allowed:
+                continue
+            scores[pos] = self._score(pos, qn)
+        return scores
+
+    def _prefix_postings(self, prefix: str) -> Set[int]:
+        result: Set[int] = set()
+        for tok in self._prefix_tokens(prefix):
+            result |= self.tokens[tok]
+        return result
+
+    def _score(self, pos: int, qn: str) -> float:
+        score = 0.0
+        for weight, value in zip(FIELD_WEIGHTS, self.fields[pos]):
+            idx = value.find(qn)
+            if idx < 0:
+                continue
+            score += weight
+            if idx == 0 or value[idx - 1] == " ":
+                # casa no início de uma palavra
+                score += weight / 2
+        return score
+
+    def _search_fuzzy(self, qn: str, allowed: Optional[FrozenSet[int]]) -> Dict[int, float]:
+        scores: Optional[Dict[int, float]] = None
+
+        for qtok in _TOKEN.findall(qn):
+            tok_scores: Dict[int, float] = {}
+            for tok, sim in self._similar_tokens(qtok).items():
+                for pos in self.tokens[tok]:
+                    if allowed is not None and pos not in allowed:
+                        continue
+                    if sim > tok_scores.get(pos, 0.0):
+                        tok_scores[pos] = sim
+
+            if scores is None:
+                scores = tok_scores
+            else:
+                # todos os termos da consulta precisam casar
+                scores = {pos: s + tok_scores[pos] for pos, s in scores.items() if pos in tok_scores}
+            if not scores:
+                return {}
+
+        return scores or {}
+
+    def _similar_tokens(self, qtok: str) -> Dict[str, float]:
+        if len(qtok) < 3:
+            return {tok: 1.0 for tok in self._prefix_tokens(qtok)}
+
+        qtris = _token_trigrams(qtok)
+        shared: Dict[str, int] = {}
+        for tri in qtris:
+            for tok in self.token_trigrams.get(tri, ()):
+                shared[tok] = shared.get(tok, 0) + 1
+
+        similar = {}
+        for tok, n in shared.items():
+            # coeficiente de Dice entre os conjuntos de trigramas
+            sim = 2 * n / (len(qtris) + self.token_trigram_count[tok])
+            if sim >= FUZZY_MIN_SIMILARITY:
+                similar[tok] = sim
+        return similar
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        out = []
+        i = bisect_left(self.sorted_tokens, prefix)
+        while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(prefix):
+            out.append(self.sorted_tokens[i])
+            i += 1
+        return out
@@ -0,0 +1,52 @@
+"""
+Seed snapshot: a lista de unidades gravada no build (scripts/scrape_unidades.py)
+e empacotada com a aplicação.
+
+Um worker sem snapshot em disco (deploy novo, escala a zero) começa servindo
+o seed, já marcado como velho, e o refresh em background o substitui pelo
+scraping. Formato: JSON compacto em gzip, que carrega em poucos ms.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import gzip
+import json
+import os
+import time
+
+
+SEED_FORMAT = 1
+
+
+def write_seed(
+    path: Path,
+    unidades: List[Dict[str, Any]],
+    fonte: Optional[str] = None,
+    ts: Optional[float] = None,
+) -> None:
+    doc = {
+        "formato": SEED_FORMAT,
+        "geradoEm": ts if ts is not None else time.time(),
+        "fonte": fonte,
+        "unidades": unidades,
+    }
+    raw = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    # mtime=0: mesmo conteúdo gera o mesmo arquivo (build reprodutível)
+    tmp.write_bytes(gzip.compress(raw, compresslevel=9, mtime=0))
+    os.replace(tmp, path)
+
+
+def load_seed(path: Path) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+    """(unidades, geradoEm) ou None se não houver seed (ou ele for de outro formato)."""
+    try:
+        raw = gzip.decompress(Path(path).read_bytes())
+    except FileNotFoundError:
+        return None
+    doc = json.loads(raw)
+    if doc.get("formato") != SEED_FORMAT:
+        return None
+    return doc["unidades"], float(doc["geradoEm"])
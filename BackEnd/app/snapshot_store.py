@@ -0,0 +1,179 @@
+"""
+Snapshot persistente das unidades, compartilhado entre workers.
+
+Usa SQLite em modo WAL: vários processos leem o mesmo snapshot sem se
+bloquear, e uma "lease" na própria base garante que só um processo por vez
+faz o scraping. Um worker reiniciado volta a servir direto do último
+snapshot gravado, sem precisar ir ao site da prefeitura.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+
+SNAPSHOTS_TO_KEEP = 5
+
+
+@dataclass(frozen=True)
+class StoredSnapshot:
+    version: int
+    ts: float
+    hash: str
+    unidades: List[Dict[str, Any]]
+
+
+def encode_unidades(unidades: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(unidades, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def content_hash(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+class SnapshotStore:
+    def __init__(self, path: str | Path, keep: int = SNAPSHOTS_TO_KEEP):
+        self.path = Path(path)
+        self.keep = keep
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    version INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    hash TEXT NOT NULL,
+                    payload BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS refresh_lease (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # -------------------------
+    # leitura
+    # -------------------------
+    def latest_meta(self) -> Optional[Tuple[int, float, str]]:
+        """(version, ts, hash) do último snapshot, sem decodificar o payload."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, ts, hash FROM snapshots ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def latest(self) -> Optional[StoredSnapshot]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, ts, hash, payload FROM snapshots ORDER BY version DESC LIMIT 1"
+            ).fetchone()
+        if not row:
+            return None
+        version, ts, h, payload = row
+        return StoredSnapshot(version=version, ts=ts, hash=h, unidades=json.loads(payload))
+
+    def get(self, version: int) -> Optional[StoredSnapshot]:
+        """Uma das últimas `keep` versões (feed de mudanças); None se já foi apagada."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, ts, hash, payload FROM snapshots WHERE version = ?", (version,)
+            ).fetchone()
+        if not row:
+            return None
+        version, ts, h, payload = row
+        return StoredSnapshot(version=version, ts=ts, hash=h, unidades=json.loads(payload))
+
+    # -------------------------
+    # escrita
+    # -------------------------
+    def save(self, unidades: List[Dict[str, Any]], ts: Optional[float] = None) -> StoredSnapshot:
+        """Grava um novo snapshot.
+
+        Se o conteúdo for idêntico ao último, só atualiza o timestamp: a versão
+        muda apenas quando os dados mudam.
+        """
+        ts = time.time() if ts is None else ts
+        payload = encode_unidades(unidades)
+        h = content_hash(payload)
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT version, hash FROM snapshots ORDER BY version DESC LIMIT 1"
+                ).fetchone()
+                if row and row[1] == h:
+                    version = row[0]
+                    conn.execute("UPDATE snapshots SET ts = ? WHERE version = ?", (ts, version))
+                else:
+                    cur = conn.execute(
+                        "INSERT INTO snapshots (ts, hash, payload) VALUES (?, ?, ?)",
+                        (ts, h, payload),
+                    )
+                    version = cur.lastrowid
+                    conn.execute(
+                        "DELETE FROM snapshots WHERE version <= ?",
+                        (version - self.keep,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return StoredSnapshot(version=version, ts=ts, hash=h, unidades=unidades)
+
+    # -------------------------
+    # lease de refresh (um processo por vez)
+    # -------------------------
+    def acquire_lease(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT owner, expires_at FROM refresh_lease WHERE name = ?", (name,)
+                ).fetchone()
+                if row and row[0] != self.owner and row[1] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO refresh_lease (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, self.owner, now + ttl),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def release_lease(self, name: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM refresh_lease WHERE name = ? AND owner = ?", (name, self.owner)
+            )
@@ -0,0 +1,115 @@
+"""
+Fontes de unidades: um adaptador por site de prefeitura.
+
+Cada fonte sabe buscar e extrair a lista de unidades do seu site (layouts
+diferentes = adaptadores diferentes) e tem o seu próprio cliente HTTP, com
+limite de taxa e circuit breaker independentes. Cache, snapshot em disco e
+seed também são por fonte (ver app.catalog): uma cidade lenta ou fora do ar
+não segura as demais.
+
+Para uma nova prefeitura: subclasse de `Source` (ou de `ListPageSource`, se
+o site tiver uma página de listagem) implementando `scrape()`/`parse()` e
+`add_coords()`, e uma instância em `SOURCES` de app.main. Coordenadas são
+da fonte: o índice de /api/unidades/proximas só usa `lat`/`lon` já
+resolvidos, e unidades sem eles ficam fora da busca por proximidade.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from app.scraper import ListScraper
+
+
+# padrão "educado" com os sites das prefeituras
+DEFAULT_RATE = 2.0  # requisições por segundo
+DEFAULT_BURST = 2
+
+
+class Source(ABC):
+    """Adaptador de uma prefeitura; `slug` identifica a cidade em `?cidade=`.
+
+    Abstrata: um adaptador sem `scrape()` ou `add_coords()` falha ao ser
+    instanciado, não no primeiro refresh.
+    """
+
+    slug: str = ""
+    nome: str = ""
+
+    @abstractmethod
+    def scrape(self) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def add_coords(self, unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Preenche `lat`, `lon` e `coordPrecisao` (None quando não houver como resolver)."""
+
+    def circuit_status(self) -> Dict[str, Any]:
+        return {"circuitoAberto": False, "novaTentativaEmSegundos": 0}
+
+    def load(self) -> List[Dict[str, Any]]:
+        return self.prepare(self.scrape())
+
+    def prepare(self, unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # coordenadas resolvidas aqui, uma vez por snapshot
+        return self.tag(self.add_coords(unidades))
+
+    def tag(self, unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # cada unidade sabe de que cidade veio (ids só são únicos por cidade)
+        for u in unidades:
+            u["cidade"] = self.slug
+        return unidades
+
+
+class ListPageSource(Source):
+    """Site com uma página de listagem: GET condicional e parse só quando ela muda."""
+
+    def __init__(
+        self,
+        slug: str,
+        nome: str,
+        list_url: str,
+        headers: Dict[str, str],
+        rate: Optional[float] = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+    ):
+        self.slug = slug
+        self.nome = nome
+        self.list_url = list_url
+        self.scraper = ListScraper(headers, name=slug, rate=rate, burst=burst)
+
+    @abstractmethod
+    def parse(self, html: str) -> List[Dict[str, Any]]:
+        ...
+
+    def scrape(self) -> List[Dict[str, Any]]:
+        return self.scraper.scrape(self.list_url, self.parse)
+
+    def circuit_status(self) -> Dict[str, Any]:
+        return self.scraper.circuit_status()
+
+
+class QuixadaSource(ListPageSource):
+    """Portal de Quixadá (unidadesaude.php): listagem única com link por unidade."""
+
+    def __init__(
+        self,
+        list_url: str,
+        detail_url: str,
+        headers: Dict[str, str],
+        slug: str = "quixada",
+        nome: str = "Quixadá",
+        **limits: Any,
+    ):
+        super().__init__(slug, nome, list_url, headers, **limits)
+        self.detail_url = detail_url
+
+    def parse(self, html: str) -> List[Dict[str, Any]]:
+        from app.parser import parse_list_unidades
+
+        return parse_list_unidades(html, self.detail_url)
+
+    def add_coords(self, unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from app.geo import add_coords
+
+        # centroides dos bairros de Quixadá (app/data/bairros_coords.py)
+        return add_coords(unidades)
@@ -0,0 +1,93 @@
+"""
+Triagem de sintomas no servidor (POST /api/triagem).
+
+O catálogo (SINTOMAS + ORIENTACOES) é compilado uma vez em um índice
+id -> coluna e numa matriz de pesos. Um lote de listas de sintomas vira uma
+matriz de presença (lote x sintomas) e a pontuação de todo o lote sai de uma
+única multiplicação de matrizes.
+
+Regra de destino (a mesma para um item ou um lote):
+1. algum sinal de alerta                          -> "emergencia"
+2. sintomas de saúde mental pesam pelo menos
+   tanto quanto os demais                          -> "caps"
+3. peso total >= LIMIAR_UPA                        -> "upa"
+4. caso contrário                                  -> "ubs"
+"""
+
+from itertools import chain
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+
+LIMIAR_UPA = 5
+CATEGORIA_SAUDE_MENTAL = "Saúde Mental"
+
+DESTINOS = ("emergencia", "caps", "upa", "ubs")
+
+# colunas da matriz de pesos
+_PESO, _ALERTA, _MENTAL = 0, 1, 2
+
+
+class TriagemCompilada:
+    def __init__(self, sintomas: Sequence[Dict[str, Any]], orientacoes: Dict[str, Any]):
+        self.ids = [s["id"] for s in sintomas]
+        self.index = {sid: i for i, sid in enumerate(self.ids)}
+
+        sinais = set(orientacoes.get("sinaisAlerta", ()))
+        pesos = np.array([s.get("peso", 0) for s in sintomas], dtype=np.int64)
+        alerta = np.array([s["id"] in sinais for s in sintomas], dtype=np.int64)
+        mental = np.array([s.get("categoria") == CATEGORIA_SAUDE_MENTAL for s in sintomas], dtype=np.int64)
+
+        # sintomas x (peso, alerta, peso de saúde mental)
+        self.matriz = np.stack([pesos, alerta, pesos * mental], axis=1)
+
+        mensagens = orientacoes.get("mensagens", {})
+        self.mensagens = [mensagens.get(d) for d in DESTINOS]
+
+    def avaliar(self, sintomas: Sequence[str]) -> Dict[str, Any]:
+        return self.avaliar_lote([sintomas])[0]
+
+    def avaliar_lote(self, lotes: Sequence[Sequence[str]]) -> List[Dict[str, Any]]:
+        n = len(lotes)
+        if n == 0:
+            return []
+
+        # presença (lote x sintomas); ids repetidos contam uma vez
+        flat = list(chain.from_iterable(lotes))
+        cols = np.fromiter((self.index.get(s, -1) for s in flat), dtype=np.int64, count=len(flat))
+        rows = np.repeat(np.arange(n), [len(lista) for lista in lotes])
+        validos = cols >= 0
+
+        presenca = np.zeros((n, len(self.ids)), dtype=np.int64)
+        presenca[rows[validos], cols[validos]] = 1
+
+        soma = presenca @ self.matriz
+        peso = soma[:, _PESO]
+        mental = soma[:, _MENTAL]
+        destino = np.select(
+            [
+                soma[:, _ALERTA] > 0,
+                (mental > 0) & (mental >= peso - mental),
+                peso >= LIMIAR_UPA,
+            ],
+            [0, 1, 2],
+            default=3,
+        )
+
+        ignorados: Dict[int, List[str]] = {}
+        if not validos.all():
+            for pos in np.flatnonzero(~validos).tolist():
+                ignorados.setdefault(int(rows[pos]), []).append(flat[pos])
+
+        alerta = (soma[:, _ALERTA] > 0).tolist()
+        return [
+            {
+                "peso": p,
+                "alerta": a,
+                "destino": DESTINOS[d],
+                "mensagem": self.mensagens[d],
+                "ignorados": ignorados.get(i, []),
+            }
+            for i, (p, a, d) in enumerate(zip(peso.tolist(), alerta, destino.tolist()))
+        ]
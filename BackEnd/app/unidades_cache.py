@@ -0,0 +1,390 @@
+"""
+Cache das unidades de saúde com refresh coordenado.
+
+- single-flight: só um scraping do site da prefeitura por vez;
+- stale-while-revalidate: enquanto o scraping roda (ou se ele falhar),
+  os leitores continuam recebendo o último snapshot bom;
+- refresh antecipado: uma task em background (iniciada no lifespan do
+  FastAPI) renova o snapshot antes de ele expirar;
+- snapshot compartilhado (opcional): com um SnapshotStore, todos os workers
+  leem o mesmo snapshot em disco e só um processo por vez faz o scraping;
+- seed (opcional): sem snapshot em disco, o worker começa servindo o seed
+  gravado no build, como snapshot velho, até o primeiro refresh;
+- histórico: as últimas versões ficam num anel (hashes por unidade) para o
+  feed de mudanças (app.changes).
+
+Leitores só esperam pelo scraping quando não há snapshot nenhum, nem em
+memória, nem em disco, nem seed.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import threading
+import time
+
+from app.changes import RecordHashes, SnapshotHistory, SourceVersion, record_hashes
+from app.metrics import SNAPSHOT_AGE, UNIDADES_CACHE, UNIDADES_REFRESH
+from app.snapshot_store import SnapshotStore, content_hash, encode_unidades
+
+
+LEASE_NAME = "unidades"
+# com a lease ocupada por outro worker, leitores velhos só tentam de novo depois disso
+LEASE_POLL_SECONDS = 5.0
+
+# () -> (unidades, ts) ou None
+SeedLoader = Callable[[], Optional[Tuple[List[Dict[str, Any]], float]]]
+
+
+class DerivedCache(dict):
+    """Estruturas derivadas de um conteúdo, com single-flight por chave.
+
+    Leitores simultâneos logo depois de um refresh esperam o mesmo build
+    (índice de busca, colunas, KD-tree) em vez de cada um montar o seu.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+
+    def get_or_build(self, key: str, build: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                value = self.get(key)
+                if value is None:
+                    value = self[key] = build()
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return value
+
+
+@dataclass(frozen=True)
+class UnidadesSnapshot:
+    unidades: List[Dict[str, Any]]
+    ts: float
+    version: int
+    hash: str
+    # estruturas derivadas (índices etc.), montadas uma vez por conteúdo
+    derived: DerivedCache = field(default_factory=DerivedCache, compare=False, repr=False)
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.ts)
+
+    def get_derived(self, key: str, build: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        return self.derived.get_or_build(key, lambda: build(self.unidades))
+
+
+@dataclass(frozen=True)
+class CacheRead:
+    snapshot: UnidadesSnapshot
+    stale: bool
+    last_error: Optional[str]
+    # fontes que ficaram de fora de uma leitura combinada (ver app.catalog)
+    missing: Tuple[str, ...] = ()
+    # versão de cada fonte presente no snapshot (token do feed de mudanças)
+    versions: Tuple[SourceVersion, ...] = ()
+
+
+class UnidadesCache:
+    def __init__(
+        self,
+        loader: Callable[[], List[Dict[str, Any]]],
+        ttl: float,
+        refresh_ahead: float,
+        retry_interval: float = 60.0,
+        min_unidades: int = 10,
+        store: Optional[SnapshotStore] = None,
+        lease_ttl: float = 120.0,
+        seed: Optional[SeedLoader] = None,
+        name: str = LEASE_NAME,
+    ):
+        self.name = name
+        self._loader = loader
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.min_unidades = min_unidades
+        self.store = store
+        self.lease_ttl = lease_ttl
+        self._seed = seed
+
+        self._snapshot: Optional[UnidadesSnapshot] = None
+        self.history = SnapshotHistory()
+        self._refresh_lock = threading.Lock()
+        self._preload_lock = threading.Lock()
+        self._seed_tried = False
+        # o seed é sempre "velho": renovado logo após o boot
+        self._seed_snapshot: Optional[UnidadesSnapshot] = None
+        self._attempts = 0
+        self._last_error: Optional[str] = None
+        self._last_error_ts: float = 0.0
+        self._lease_busy_until: float = 0.0
+        # no máximo uma thread de refresh em background por vez
+        self._background_lock = threading.Lock()
+        self._background_running = False
+
+    # -------------------------
+    # leitura
+    # -------------------------
+    @property
+    def snapshot(self) -> Optional[UnidadesSnapshot]:
+        return self._snapshot
+
+    @property
+    def last_error(self) -> Optional[str]:
+        return self._last_error
+
+    def get(self) -> CacheRead:
+        snap = self._snapshot
+        miss = snap is None
+        if miss:
+            snap = self._load_cold()
+
+        age = snap.age
+        stale = age >= self.ttl or snap is self._seed_snapshot
+        if stale:
+            self.refresh_in_background()
+
+        UNIDADES_CACHE.inc(fonte=self.name, result="miss" if miss else "stale" if stale else "hit")
+        SNAPSHOT_AGE.set(age, fonte=self.name)
+
+        return CacheRead(
+            snapshot=snap,
+            stale=stale,
+            last_error=self._last_error,
+            versions=(SourceVersion(self.name, snap.version, snap.hash),),
+        )
+
+    def hashes_at(self, since: SourceVersion) -> Optional[RecordHashes]:
+        """Hashes por unidade da versão `since`, do anel ou do SnapshotStore; None se já saiu dos dois."""
+        hashes = self.history.get(since)
+        if hashes is None and self.store is not None:
+            # versão gravada por outro worker (ou anterior a este processo)
+            stored = self.store.get(since.version)
+            if stored is not None and since.matches(stored.version, stored.hash):
+                hashes = record_hashes(stored.unidades)
+        return hashes
+
+    def preload(self) -> bool:
+        """Carrega o snapshot do disco ou o seed, sem scraping.
+
+        Não espera um refresh em andamento. Retorna True se há snapshot em memória.
+        """
+        with self._preload_lock:
+            if self._snapshot is None and not self._adopt_stored(min_ts=0.0):
+                self._adopt_seed()
+        return self._snapshot is not None
+
+    def _load_cold(self) -> UnidadesSnapshot:
+        # worker novo: disco ou seed, mesmo velhos, antes de esperar o scraping
+        if self.preload():
+            return self._snapshot
+
+        # Sem nada local: todos esperam o mesmo scraping. Quem estava na fila
+        # quando ele falhou recebe o mesmo erro em vez de tentar de novo.
+        attempt = self._attempts
+        if self._last_error_ts and time.time() - self._last_error_ts < self.retry_interval:
+            raise RuntimeError(self._last_error)
+        with self._refresh_lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            # worker reiniciado: serve o último snapshot em disco, mesmo velho
+            if self._adopt_stored(min_ts=0.0):
+                return self._snapshot
+            if self._attempts != attempt and self._last_error:
+                raise RuntimeError(self._last_error)
+            self._refresh_locked(wait=True)
+            return self._snapshot
+
+    # -------------------------
+    # refresh
+    # -------------------------
+    def refresh(self) -> bool:
+        """Atualiza o snapshot se nenhum outro refresh estiver em andamento.
+
+        Retorna False se outro refresh (neste ou em outro processo) já estava
+        rodando. Erros do loader são propagados; o snapshot anterior é mantido.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            return self._refresh_locked(wait=False)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_locked(self, wait: bool) -> bool:
+        self._attempts += 1
+        try:
+            updated = self._refresh_from_source(wait)
+        except Exception as e:
+            self._last_error = f"Erro no scraping: {e}"
+            self._last_error_ts = time.time()
+            UNIDADES_REFRESH.inc(fonte=self.name, result="error")
+            raise
+
+        UNIDADES_REFRESH.inc(fonte=self.name, result="updated" if updated else "skipped")
+        if updated:
+            self._last_error = None
+            self._last_error_ts = 0.0
+        return updated
+
+    def _refresh_from_source(self, wait: bool) -> bool:
+        if self.store is None:
+            unidades = self._load_unidades()
+            prev = self._snapshot
+            payload_hash = content_hash(encode_unidades(unidades))
+            if prev is not None and prev.hash == payload_hash:
+                self._set_snapshot(UnidadesSnapshot(
+                    unidades=prev.unidades, ts=time.time(), version=prev.version,
+                    hash=prev.hash, derived=prev.derived,
+                ))
+            else:
+                self._set_snapshot(UnidadesSnapshot(
+                    unidades=unidades, ts=time.time(), version=(prev.version if prev else 0) + 1,
+                    hash=payload_hash,
+                ))
+            return True
+
+        # worker reiniciado: começa servindo o que está em disco, mesmo velho
+        if self._snapshot is None and self._adopt_stored(min_ts=0.0):
+            return True
+
+        # outro worker pode ter renovado o snapshot há pouco
+        if self._adopt_stored(min_ts=time.time() - (self.ttl - self.refresh_ahead)):
+            return True
+
+        started = time.time()
+        while not self.store.acquire_lease(self.name, self.lease_ttl):
+            if not wait:
+                self._lease_busy_until = time.time() + min(LEASE_POLL_SECONDS, self.lease_ttl)
+                return False
+            if time.time() - started > self.lease_ttl:
+                raise RuntimeError("Tempo esgotado esperando o refresh de outro worker")
+            time.sleep(0.5)
+            if self._adopt_stored(min_ts=started):
+                return True
+
+        self._lease_busy_until = 0.0
+        try:
+            if self._adopt_stored(min_ts=time.time() - (self.ttl - self.refresh_ahead)):
+                return True
+            stored = self.store.save(self._load_unidades())
+        finally:
+            self.store.release_lease(self.name)
+
+        current = self._snapshot
+        if current is not None and current.hash == stored.hash:
+            self._set_snapshot(UnidadesSnapshot(
+                unidades=current.unidades, ts=stored.ts, version=stored.version,
+                hash=stored.hash, derived=current.derived,
+            ))
+        else:
+            self._set_snapshot(UnidadesSnapshot(
+                unidades=stored.unidades, ts=stored.ts, version=stored.version, hash=stored.hash
+            ))
+        return True
+
+    def _load_unidades(self) -> List[Dict[str, Any]]:
+        unidades = self._loader()
+        if len(unidades) < self.min_unidades:
+            raise RuntimeError("Poucas unidades retornadas no scraping")
+        return unidades
+
+    def _adopt_stored(self, min_ts: float) -> bool:
+        """Adota o snapshot do disco se ele for mais novo que o atual e que min_ts."""
+        if self.store is None:
+            return False
+        meta = self.store.latest_meta()
+        if meta is None:
+            return False
+        version, ts, h = meta
+        current = self._snapshot
+        if ts < min_ts or (current is not None and ts <= current.ts):
+            return False
+
+        if current is not None and h == current.hash:
+            # mesmo conteúdo, só renovado: reaproveita a lista já carregada
+            self._set_snapshot(UnidadesSnapshot(
+                unidades=current.unidades, ts=ts, version=version, hash=h, derived=current.derived
+            ))
+            return True
+
+        stored = self.store.latest()
+        if stored is None:
+            return False
+        self._set_snapshot(UnidadesSnapshot(
+            unidades=stored.unidades, ts=stored.ts, version=stored.version, hash=stored.hash
+        ))
+        return True
+
+    def _adopt_seed(self) -> bool:
+        if self._seed is None or self._seed_tried:
+            return False
+        self._seed_tried = True
+        try:
+            seed = self._seed()
+        except Exception:
+            # seed corrompido não impede o boot; segue para o scraping
+            return False
+        if not seed or len(seed[0]) < self.min_unidades:
+            return False
+        unidades, ts = seed
+        snap = UnidadesSnapshot(unidades=unidades, ts=ts, version=0, hash=content_hash(encode_unidades(unidades)))
+        if self._snapshot is not None:
+            # um refresh terminou enquanto o seed carregava
+            return False
+        self._seed_snapshot = snap
+        self._set_snapshot(snap)
+        return True
+
+    def _set_snapshot(self, snap: UnidadesSnapshot) -> None:
+        self._snapshot = snap
+        self.history.record(snap)
+
+    def refresh_in_background(self) -> None:
+        now = time.time()
+        if self._refresh_lock.locked() or now < self._lease_busy_until:
+            return
+        if self._last_error_ts and now - self._last_error_ts < self.retry_interval:
+            return
+        with self._background_lock:
+            if self._background_running:
+                return
+            self._background_running = True
+        threading.Thread(target=self._refresh_quietly, name=f"refresh-{self.name}", daemon=True).start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            pass
+        finally:
+            self._background_running = False
+
+    def next_refresh_in(self) -> float:
+        snap = self._snapshot
+        if self._last_error_ts and (snap is None or self._last_error_ts > snap.ts):
+            return max(0.0, self._last_error_ts + self.retry_interval - time.time())
+        if snap is None or snap is self._seed_snapshot:
+            return 0.0
+        return max(0.0, snap.ts + self.ttl - self.refresh_ahead - time.time())
+
+    async def run_refresher(self) -> None:
+        """Loop de refresh antecipado; deve rodar como task do lifespan."""
+        while True:
+            await asyncio.sleep(self.next_refresh_in())
+            try:
+                if not await asyncio.to_thread(self.refresh):
+                    # outro refresh em andamento (leitor frio ou outro worker)
+                    await asyncio.sleep(max(1.0, self._lease_busy_until - time.time()))
+            except Exception:
+                # mantém o snapshot antigo; nova tentativa após retry_interval
+                pass
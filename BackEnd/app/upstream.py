@@ -0,0 +1,255 @@
+"""
+Cliente HTTP compartilhado para o site da prefeitura (API e scripts/).
+
+- pool de conexões keep-alive (uma Session por cliente), sem novo
+  handshake TCP/TLS a cada página;
+- retentativas com backoff exponencial e jitter para falhas transitórias
+  (erro de conexão, timeout, 429 e 5xx), dentro de um prazo total que
+  também limita o timeout de cada tentativa;
+- GET condicional: quem guardou os validadores (ETag / Last-Modified) de
+  uma resposta anterior recebe `not_modified=True` num 304 e reaproveita o
+  que já tinha processado;
+- circuit breaker: depois de `failure_threshold` buscas seguidas com falha,
+  novas chamadas falham na hora (CircuitOpenError) durante `cooldown`
+  segundos; passado esse tempo, uma única chamada de teste decide se o
+  circuito fecha de novo;
+- limite de taxa (opcional): no máximo `rate` requisições/s ao site, com
+  rajadas de até `burst`, contando as retentativas.
+
+Cada site (fonte) tem o seu cliente: pool, circuito e limite são por fonte.
+"""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.metrics import UPSTREAM_BYTES, UPSTREAM_CIRCUIT, UPSTREAM_LATENCY, UPSTREAM_RETRIES, UPSTREAM_STATUS
+
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+MIN_ATTEMPT_TIMEOUT = 0.1
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def headers(self) -> Dict[str, str]:
+        out = {}
+        if self.etag:
+            out["If-None-Match"] = self.etag
+        if self.last_modified:
+            out["If-Modified-Since"] = self.last_modified
+        return out
+
+
+@dataclass(frozen=True)
+class UpstreamResponse:
+    status: int
+    text: Optional[str]  # None quando not_modified
+    validators: Validators
+    not_modified: bool = False
+
+
+class RateLimiter:
+    """Token bucket bloqueante (threads): `rate` requisições/s, rajadas de até `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            # o token já foi reservado; quem vier depois espera a sua vez
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0, name: str = ""):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def retry_in(self) -> float:
+        opened = self._opened_at
+        if opened is None:
+            return 0.0
+        return max(0.0, opened + self.cooldown - time.monotonic())
+
+    def allow(self) -> None:
+        """Levanta CircuitOpenError se a chamada não deve ir ao upstream agora."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.cooldown or self._probing:
+                raise CircuitOpenError(
+                    f"Site da prefeitura indisponível; nova tentativa em {int(self.retry_in()) + 1}s"
+                )
+            # meio-aberto: só esta chamada testa o upstream
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        UPSTREAM_CIRCUIT.set(0, fonte=self.name)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+            opened = self._opened_at is not None
+        UPSTREAM_CIRCUIT.set(1 if opened else 0, fonte=self.name)
+
+
+class UpstreamClient:
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 20.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        deadline: float = 30.0,
+        pool_size: int = 16,
+        breaker: Optional[CircuitBreaker] = None,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        name: str = "",
+    ):
+        self.name = name
+        self.headers = dict(headers or {})
+        self.timeout = (connect_timeout, timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker(name=name)
+        self.limiter = RateLimiter(rate, burst) if rate else None
+
+        self.session = requests.Session()
+        # retentativas ficam aqui (com jitter e prazo), não no urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url: str, validators: Optional[Validators] = None) -> UpstreamResponse:
+        """GET com retentativas; com `validators`, um 304 vira `not_modified=True`.
+
+        Levanta CircuitOpenError (sem tocar na rede) com o circuito aberto e
+        requests.RequestException quando as tentativas se esgotam.
+        """
+        self.breaker.allow()
+        headers = {**self.headers, **(validators.headers() if validators else {})}
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                resp = self._get(url, headers, self._attempt_timeout(started))
+                if resp.status_code in RETRY_STATUS:
+                    resp.raise_for_status()
+            except requests.RequestException as e:
+                retryable = not isinstance(e, requests.HTTPError) or e.response.status_code in RETRY_STATUS
+                delay = self._backoff(attempt, getattr(e, "response", None))
+                if not retryable or attempt >= self.retries or time.monotonic() - started + delay >= self.deadline:
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                UPSTREAM_RETRIES.inc(fonte=self.name)
+                time.sleep(delay)
+                continue
+
+            if resp.status_code == 304 and validators:
+                self.breaker.record_success()
+                return UpstreamResponse(status=304, text=None, validators=validators, not_modified=True)
+            try:
+                # 4xx: o site respondeu, então não conta contra o circuito
+                resp.raise_for_status()
+            finally:
+                self.breaker.record_success()
+            return UpstreamResponse(
+                status=resp.status_code,
+                text=resp.text,
+                validators=Validators(resp.headers.get("ETag"), resp.headers.get("Last-Modified")),
+            )
+
+    def get_text(self, url: str) -> str:
+        return self.fetch(url).text
+
+    def _attempt_timeout(self, started: float) -> Tuple[float, float]:
+        # cada tentativa só usa o que sobra do prazo total
+        remaining = max(MIN_ATTEMPT_TIMEOUT, self.deadline - (time.monotonic() - started))
+        connect, read = self.timeout
+        return min(connect, remaining), min(read, remaining)
+
+    def _get(self, url: str, headers: Dict[str, str], timeout: Tuple[float, float]) -> requests.Response:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            resp = self.session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            UPSTREAM_STATUS.inc(fonte=self.name, status=type(e).__name__)
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - t0, fonte=self.name)
+        UPSTREAM_STATUS.inc(fonte=self.name, status=str(resp.status_code))
+        UPSTREAM_BYTES.observe(len(resp.content), fonte=self.name)
+        return resp
+
+    def _backoff(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        # "full jitter": espalha as retentativas de vários workers
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = _retry_after(resp) if resp is not None else None
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,234 @@
+"""
+Teste de carga em processo: chama a aplicação ASGI diretamente (sem rede
+entre cliente e API), com o site da prefeitura simulado por
+`upstream_server` (latência e falhas configuráveis).
+
+Cenários, para cada rota:
+- cold:    cache e snapshot em disco vazios a cada rodada; a primeira leva de
+           requisições concorrentes paga o scraping;
+- warm:    snapshot carregado e dentro do TTL;
+- expired: snapshot vencido; as requisições disparam o refresh em background
+           contra o upstream lento e devem continuar servindo a cópia antiga.
+
+    python -m benchmarks.bench_load --requests 2000 --concurrency 32 --out var/bench/load.json
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import make_units
+from benchmarks.results import latency_summary, write_results
+from benchmarks.upstream_server import start_server
+
+
+ROUTES = [
+    "/",
+    "/api/health",
+    "/api/metrics",
+    "/api/sintomas",
+    "/api/orientacoes",
+    "/api/unidades",
+    "/api/unidades?tipo=upa",
+    "/api/unidades?q=centro&tipo=ubs",
+    "/api/unidades/changes",
+]
+SCENARIOS = ("cold", "warm", "expired")
+
+
+async def asgi_get(app, path_qs: str, headers: Sequence[Tuple[bytes, bytes]] = ()) -> Tuple[int, bytes]:
+    path, _, qs = path_qs.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": qs.encode(),
+        "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, bytes(body)
+
+
+async def drive(app, path: str, total: int, concurrency: int) -> Tuple[List[float], Dict[int, int], float]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            status, _ = await asgi_get(app, path, [(b"accept-encoding", b"gzip, br")])
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - t0
+
+
+class Harness:
+    """Prepara app.main contra o upstream simulado e controla o estado do cache."""
+
+    def __init__(self, units: int, upstream_latency: float, fail_rate: float):
+        self.tmp = tempfile.TemporaryDirectory(prefix="guia-bench-")
+        os.environ["GUIA_SAUDE_SNAPSHOT_DB"] = str(Path(self.tmp.name) / "unidades.sqlite3")
+
+        import app.main as main
+
+        self.main = main
+        self.server, self.upstream, url = start_server(
+            make_units(units), latency=upstream_latency, fail_rate=fail_rate
+        )
+        self.source = main.SOURCES[0]
+        self.source.list_url = url
+
+    @property
+    def cache(self):
+        return self.main.catalog.caches[self.source.slug]
+
+    def reset_cold(self) -> None:
+        from app.snapshot_store import SnapshotStore
+        from app.unidades_cache import UnidadesCache
+
+        old = self.cache
+        db = Path(self.tmp.name) / f"unidades-{time.perf_counter_ns()}.sqlite3"
+        self.main.catalog.caches[self.source.slug] = UnidadesCache(
+            loader=old._loader,
+            ttl=old.ttl,
+            refresh_ahead=old.refresh_ahead,
+            retry_interval=old.retry_interval,
+            store=SnapshotStore(db),
+            name=old.name,
+        )
+        # sem a última listagem processada: o primeiro scraping faz o parse
+        self.source.scraper._last = None
+        self._reset_payloads()
+
+    def warm(self) -> None:
+        self.cache.get()
+
+    def expire(self) -> None:
+        # mesmo snapshot, mas com o TTL já vencido
+        self.warm()
+        cache = self.cache
+        cache._snapshot = dataclasses.replace(cache.snapshot, ts=time.time() - cache.ttl - 1)
+        self._reset_payloads()
+
+    def _reset_payloads(self) -> None:
+        payloads = getattr(self.main, "unidades_payloads", None)
+        if payloads is not None:
+            payloads.clear()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.tmp.cleanup()
+
+
+async def run_scenario(
+    h: Harness, scenario: str, path: str, total: int, concurrency: int, cold_rounds: int
+) -> Dict[str, Any]:
+    app = h.main.app
+    before = h.upstream.requests
+
+    if scenario == "cold":
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        elapsed = 0.0
+        for _ in range(cold_rounds):
+            h.reset_cold()
+            lat, st, el = await drive(app, path, concurrency, concurrency)
+            latencies += lat
+            elapsed += el
+            for k, v in st.items():
+                statuses[k] = statuses.get(k, 0) + v
+    else:
+        h.reset_cold()
+        if scenario == "warm":
+            h.warm()
+        else:
+            h.expire()
+        latencies, statuses, elapsed = await drive(app, path, total, concurrency)
+
+    return {
+        **latency_summary(latencies, elapsed),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "upstream_requests": h.upstream.requests - before,
+    }
+
+
+async def run_all(args) -> Dict[str, Any]:
+    h = Harness(args.units, args.upstream_latency, args.fail_rate)
+    try:
+        results: Dict[str, Any] = {}
+        for scenario in args.scenarios:
+            results[scenario] = {}
+            for path in args.routes:
+                results[scenario][path] = await run_scenario(
+                    h, scenario, path, args.requests, args.concurrency, args.cold_rounds
+                )
+                r = results[scenario][path]
+                print(
+                    f"{scenario:>7} {path:<36} {r['throughput_rps']:>9.1f} rps  "
+                    f"p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms  "
+                    f"upstream={r['upstream_requests']}"
+                )
+        return results
+    finally:
+        h.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=2000, help="requisições por rota (warm/expired)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cold-rounds", type=int, default=5)
+    parser.add_argument("--upstream-latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--routes", nargs="+", default=ROUTES)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Teste de carga em processo da API.")
+    add_arguments(parser)
+    parser.add_argument("--out", type=Path, help="grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_all(args))
+    if args.out:
+        write_results(args.out, {"load": results, "params": {k: v for k, v in vars(args).items() if k != "out"}})
+        print(f"Resultados em {args.out}")
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Micro-benchmarks das funções quentes de app/main.py.
+
+    python -m benchmarks.bench_micro --units 300
+"""
+
+from typing import Any, Callable, Dict
+import argparse
+import json
+import random
+import time
+
+from benchmarks.fixtures import make_units, render_list_page, scale_recorded_list
+
+
+def bench(fn: Callable[[], Any], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """Tempo por chamada (melhor de `repeat` rodadas de pelo menos `min_time` s)."""
+    # calibra o número de chamadas por rodada
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - t0 >= min_time / 10 or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    return {"us_per_call": round(best * 1e6, 3), "loops": loops}
+
+
+def run(units: int) -> Dict[str, Dict[str, float]]:
+    import app.main as main
+    from app.geo import add_coords
+    from app.parser import extract_bairro_from_endereco, infer_tipo, parse_list_unidades
+    from app.search import UnidadesIndex
+
+    def parse(html: str):
+        return add_coords(parse_list_unidades(html, main.DETAIL_URL))
+
+    list_html = render_list_page(make_units(units))
+    recorded_html = scale_recorded_list(units)
+    unidades = parse(list_html)
+
+    block = " ".join(f"{u['nome']} {u['endereco']} {u['horario'] or ''}" for u in unidades[:1])
+    index = UnidadesIndex(unidades)
+
+    # parse + coordenadas, sem a rede (mesmos nomes de antes, para o compare)
+    results: Dict[str, Dict[str, float]] = {}
+    results["_scrape_list_unidades(sintetico)"] = bench(lambda: parse(list_html))
+    results["_scrape_list_unidades(gravado)"] = bench(lambda: parse(recorded_html))
+
+    results["_infer_tipo"] = bench(lambda: infer_tipo("UNIDADE BÁSICA CENTRO", "RUA A - CENTRO", block))
+    results["_extract_bairro_from_endereco"] = bench(
+        lambda: extract_bairro_from_endereco("RUA JOSÉ DE QUEIROZ PESSOA, 1200 - CAMPO VELHO")
+    )
+    results["UnidadesIndex(build)"] = bench(lambda: UnidadesIndex(unidades), repeat=3)
+    results["listar_unidades(tipo)"] = bench(lambda: index.search(tipo="upa"))
+    results["listar_unidades(q)"] = bench(lambda: index.search(q="campo velho"))
+    results["listar_unidades(q+tipo)"] = bench(lambda: index.search(q="centro", tipo="ubs"))
+    results["listar_unidades(q fuzzy)"] = bench(lambda: index.search(q="baviira"))
+
+    from app.columns import UnidadesColumns
+
+    columns = UnidadesColumns(unidades)
+    todas = range(len(unidades))
+    results["projecao(id,nome,tipo)"] = bench(lambda: columns.json_array(todas, ("id", "nome", "tipo")))
+    results["projecao(todos os campos)"] = bench(lambda: columns.json_array(todas, columns.fields))
+
+    from app.changes import Changes, record_hashes
+    from app.unidades_cache import UnidadesSnapshot
+
+    # feed de mudanças: hashes por unidade (uma vez por versão) e diff com 1% alterado
+    editadas = [dict(u) for u in unidades]
+    for u in editadas[::100]:
+        u["nome"] += " (editado)"
+    antigos = record_hashes(unidades)
+    nova = UnidadesSnapshot(unidades=editadas, ts=0.0, version=2, hash="")
+    nova.get_derived("record_hashes", record_hashes)
+    results["record_hashes"] = bench(lambda: record_hashes(unidades), repeat=3)
+    results["changes(diff)"] = bench(lambda: Changes(versao="").add_diff(antigos, nova))
+
+    from app.geo import GeoIndex
+
+    rnd = random.Random(0)
+    # ~todas as unidades do estado: pontos aleatórios na caixa do Ceará
+    estado = [
+        {"id": i, "tipo": rnd.choice(("ubs", "upa", "caps")), "lat": rnd.uniform(-7.8, -2.8), "lon": rnd.uniform(-41.4, -37.2)}
+        for i in range(20000)
+    ]
+    geo = GeoIndex(estado)
+    results["GeoIndex(build, 20000)"] = bench(lambda: GeoIndex(estado), repeat=1)
+    results["proximas(k=5, tipo)"] = bench(lambda: geo.nearest(-4.97, -39.01, 5, "upa"))
+    results["proximas(k=5)"] = bench(lambda: geo.nearest(-4.97, -39.01, 5))
+
+    triagem = main.get_triagem()
+    lotes = [rnd.sample(triagem.ids, rnd.randint(1, 5)) for _ in range(1000)]
+    results["triagem(lote de 1000)"] = bench(lambda: triagem.avaliar_lote(lotes))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de app/main.py.")
+    parser.add_argument("--units", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(args.units), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
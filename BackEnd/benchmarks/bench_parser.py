@@ -0,0 +1,86 @@
+"""
+Benchmark do parser da listagem: passada única (app.parser) x parser antigo.
+
+Antes de medir, confere que os dois produzem exatamente a mesma saída na
+fixture gravada e em cada página sintética.
+
+    python -m benchmarks.bench_parser --sizes 100 500 1000 2000
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse
+import json
+import time
+
+from app.parser import parse_list_unidades
+from benchmarks.fixtures import make_units, render_list_page
+from benchmarks.legacy_parser import DETAIL_URL, scrape_list_unidades
+
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def parse_new(html: str):
+    return parse_list_unidades(html, DETAIL_URL)
+
+
+def parse_legacy(html: str):
+    return scrape_list_unidades(html, DETAIL_URL)
+
+
+def check_equivalent(html: str, label: str) -> None:
+    new, old = parse_new(html), parse_legacy(html)
+    if new != old:
+        raise SystemExit(f"Saída diferente do parser antigo em {label}")
+
+
+def best_of(fn: Callable[[str], object], html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict[str, float]]:
+    check_equivalent((FIXTURES / "quixada_list.html").read_text(encoding="utf-8"), "quixada_list.html")
+
+    results = []
+    for n in sizes:
+        html = render_list_page(make_units(n))
+        check_equivalent(html, f"página sintética com {n} unidades")
+        new = best_of(parse_new, html, repeat)
+        old = best_of(parse_legacy, html, repeat)
+        results.append(
+            {
+                "units": n,
+                "bytes": len(html.encode("utf-8")),
+                "new_ms": round(new * 1000, 3),
+                "legacy_ms": round(old * 1000, 3),
+                "speedup": round(old / new, 2),
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser da listagem de unidades.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'unidades':>8} {'novo (ms)':>10} {'antigo (ms)':>12} {'ganho':>7}")
+    for r in results:
+        print(f"{r['units']:>8} {r['new_ms']:>10.1f} {r['legacy_ms']:>12.1f} {r['speedup']:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Várias fontes (cidades) contra servidores locais de fixtures: ingestão em
+paralelo, isolamento de falhas e escala com o número de fontes.
+
+Para cada N: sobe N `upstream_server` (cada um com a sua latência), monta
+um Catalog com N adaptadores e mede
+- cold:    primeira leitura combinada com todas as fontes frias (responde
+           com a primeira que carregar) e tempo até todas carregarem;
+- refresh: renovação de todas as fontes (cada uma no seu loop/thread);
+- memória: bytes alocados pelos índices (busca, colunas, geo) do catálogo combinado;
+- isolamento: com uma fonte fora do ar e outra mais lenta que o `cold_wait`,
+  a leitura combinada sai com as demais e lista as que ficaram de fora.
+
+    python -m benchmarks.bench_sources --sources 1 2 4 8 --units 300 --upstream-latency 0.3
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+
+from benchmarks.fixtures import make_units
+from benchmarks.results import write_results
+from benchmarks.upstream_server import start_server
+
+
+HEADERS = {"User-Agent": "GuiaSaude-Bench/1.0"}
+
+
+def _build(n: int, units: int, latencies: List[float], fail: Optional[int] = None, cold_wait: float = 30.0):
+    from app.catalog import Catalog
+    from app.sources import QuixadaSource
+    from app.unidades_cache import UnidadesCache
+
+    servers, caches = [], {}
+    for i in range(n):
+        server, _, url = start_server(
+            make_units(units, seed=i), latency=latencies[i], fail_rate=1.0 if i == fail else 0.0
+        )
+        servers.append(server)
+        source = QuixadaSource(
+            list_url=url, detail_url=url + "?id={id}", headers=HEADERS, slug=f"cidade{i}", nome=f"Cidade {i}"
+        )
+        # retentativas desligadas: a fonte fora do ar falha na hora
+        source.scraper.client.retries = 0
+        caches[source.slug] = UnidadesCache(
+            loader=source.load, ttl=3600, refresh_ahead=60, name=source.slug
+        )
+    return Catalog(caches, cold_wait=cold_wait), servers
+
+
+def _close(servers) -> None:
+    for server in servers:
+        server.shutdown()
+
+
+def _index_all(catalog) -> None:
+    from app.columns import UnidadesColumns
+    from app.geo import GeoIndex
+    from app.search import UnidadesIndex
+
+    snap = catalog.read().snapshot
+    for key, build in (("search", UnidadesIndex), ("columns", UnidadesColumns), ("geo", GeoIndex)):
+        snap.get_derived(key, build)
+
+
+def run_scaling(sizes: List[int], units: int, latency: float) -> Dict[str, Any]:
+    # importa os módulos dos índices antes, para não contá-los na memória
+    catalog, servers = _build(1, units, [0.0])
+    _index_all(catalog)
+    _close(servers)
+    results: Dict[str, Any] = {}
+    for n in sizes:
+        catalog, servers = _build(n, units, [latency] * n)
+        try:
+            t0 = time.perf_counter()
+            catalog.read()
+            cold_s = time.perf_counter() - t0
+            # as demais seguem carregando em background; espera todas
+            for cache in catalog.caches.values():
+                cache.get()
+            all_s = time.perf_counter() - t0
+            read = catalog.read()
+
+            tracemalloc.start()
+            _index_all(catalog)
+            index_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            # todas as fontes renovando ao mesmo tempo, como nos loops do lifespan
+            t0 = time.perf_counter()
+            threads = [threading.Thread(target=cache.refresh) for cache in catalog.caches.values()]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            refresh_s = time.perf_counter() - t0
+        finally:
+            _close(servers)
+
+        results[str(n)] = {
+            "unidades": len(read.snapshot.unidades),
+            "cold_ms": round(cold_s * 1000, 1),
+            "todas_ms": round(all_s * 1000, 1),
+            "refresh_ms": round(refresh_s * 1000, 1),
+            "index_kib": round(index_bytes / 1024, 1),
+            "index_kib_por_fonte": round(index_bytes / 1024 / n, 1),
+        }
+        r = results[str(n)]
+        print(
+            f"N={n:<3} unidades={r['unidades']:<6} cold {r['cold_ms']:>8.1f} ms  todas {r['todas_ms']:>8.1f} ms  "
+            f"refresh {r['refresh_ms']:>8.1f} ms  índices {r['index_kib']:>9.1f} KiB "
+            f"({r['index_kib_por_fonte']:.1f}/fonte)"
+        )
+    return results
+
+
+def run_isolation(units: int, latency: float) -> Dict[str, Any]:
+    # cidade0: normal; cidade1: fora do ar; cidade2: mais lenta que o cold_wait
+    cold_wait = max(0.5, latency * 3)
+    catalog, servers = _build(3, units, [latency, latency, cold_wait * 2], fail=1, cold_wait=cold_wait)
+    try:
+        t0 = time.perf_counter()
+        first = catalog.read()
+        first_s = time.perf_counter() - t0
+        time.sleep(cold_wait * 2)
+        later = catalog.read()
+    finally:
+        _close(servers)
+
+    result = {
+        "primeira_ms": round(first_s * 1000, 1),
+        "primeira_cidades": sorted({u["cidade"] for u in first.snapshot.unidades}),
+        "primeira_faltando": list(first.missing),
+        "depois_cidades": sorted({u["cidade"] for u in later.snapshot.unidades}),
+        "depois_faltando": list(later.missing),
+    }
+    print(f"isolamento: {json.dumps(result, ensure_ascii=False)}")
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Ingestão de várias fontes contra servidores de fixtures.")
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--upstream-latency", type=float, default=0.3)
+    parser.add_argument("--out", type=Path, help="grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    results = {
+        "escala": run_scaling(args.sources, args.units, args.upstream_latency),
+        "isolamento": run_isolation(args.units, args.upstream_latency),
+    }
+    if args.out:
+        write_results(args.out, {"sources": results, "params": {k: str(v) for k, v in vars(args).items() if k != "out"}})
+        print(f"Resultados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Cold start: tempo de import de app.main e tempo até a primeira resposta de
+/api/unidades num processo novo, sem snapshot em disco (como um worker
+recém-criado num deploy que escala a zero).
+
+Cada rodada sobe um interpretador novo; o site da prefeitura é o
+`upstream_server` com latência configurável.
+
+    python -m benchmarks.bench_startup --rounds 5 --upstream-latency 1.0
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import make_units
+from benchmarks.results import write_results
+from benchmarks.upstream_server import start_server
+
+
+BACKEND = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("requests", "urllib3", "lxml", "bs4", "numpy")
+
+_CHILD = r"""
+import asyncio, json, sys, time
+spawned, url = float(sys.argv[1]), sys.argv[2]
+t0 = time.perf_counter()
+import app.main as main
+t_import = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+main.SOURCES[0].list_url = url
+
+from benchmarks.bench_load import asgi_get
+
+async def first_response():
+    async with main.app.router.lifespan_context(main.app):
+        status, body = await asgi_get(main.app, "/api/unidades")
+        return status, body, time.time()
+
+status, body, done = asyncio.run(first_response())
+print(json.dumps({{
+    "import_s": t_import,
+    "first_response_s": done - spawned,
+    "status": status,
+    "unidades": len(json.loads(body)) if status == 200 else 0,
+    "heavy_on_import": loaded,
+}}))
+"""
+
+
+def run_once(url: str, env: Dict[str, str]) -> Dict[str, Any]:
+    code = _CHILD.format(heavy=HEAVY_MODULES)
+    spawned = time.time()
+    out = subprocess.run(
+        [sys.executable, "-c", code, repr(spawned), url],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(rounds: int, units: int, upstream_latency: float, seed: Optional[Path] = None) -> Dict[str, Any]:
+    server, _, url = start_server(make_units(units), latency=upstream_latency)
+    samples: List[Dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="guia-startup-") as tmp:
+            if seed is not None:
+                # a aplicação procura o seed de cada fonte em <base>-<cidade>.json.gz
+                shutil.copy(seed, Path(tmp) / "seed-quixada.json.gz")
+            for i in range(rounds):
+                env = {
+                    **os.environ,
+                    "PYTHONPATH": str(BACKEND),
+                    "GUIA_SAUDE_SNAPSHOT_DB": str(Path(tmp) / f"unidades-{i}.sqlite3"),
+                    "GUIA_SAUDE_SEED": str(Path(tmp) / "seed.json.gz"),
+                }
+                samples.append(run_once(url, env))
+    finally:
+        server.shutdown()
+
+    def med(key: str) -> float:
+        return round(statistics.median(s[key] for s in samples) * 1000, 1)
+
+    return {
+        "import_ms": med("import_s"),
+        "first_response_ms": med("first_response_s"),
+        "statuses": sorted({s["status"] for s in samples}),
+        "heavy_on_import": samples[0]["heavy_on_import"],
+        "samples": samples,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Tempo de import e de primeira resposta (cold start).")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--units", type=int, default=300)
+    parser.add_argument("--upstream-latency", type=float, default=1.0)
+    parser.add_argument("--seed", type=Path, help="seed de Quixadá a usar (padrão: nenhum)")
+    parser.add_argument("--out", type=Path, help="grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args.rounds, args.units, args.upstream_latency, args.seed)
+    print(
+        f"import {result['import_ms']:.1f} ms  primeira resposta {result['first_response_ms']:.1f} ms  "
+        f"status {result['statuses']}  carregados no import: {', '.join(result['heavy_on_import']) or '-'}"
+    )
+    if args.out:
+        write_results(args.out, {"startup": result, "params": {k: str(v) for k, v in vars(args).items() if k != "out"}})
+        print(f"Resultados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compara dois resultados de `benchmarks.run` (ou `bench_load --out`).
+
+    python -m benchmarks.compare var/bench/antes.json var/bench/depois.json
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+import argparse
+import json
+
+
+# métricas em que menor é melhor; o resto (throughput, speedup) maior é melhor
+LOWER_IS_BETTER = ("_ms", "us_per_call")
+
+
+def _flatten(data: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(data, dict):
+        for k, v in data.items():
+            if k in ("meta", "params", "statuses"):
+                continue
+            yield from _flatten(v, f"{prefix}/{k}" if prefix else str(k))
+    elif isinstance(data, list):
+        for item in data:
+            # resultados do parser: uma entrada por tamanho de página
+            key = f"units={item.get('units')}" if isinstance(item, dict) else ""
+            yield from _flatten(item, f"{prefix}/{key}")
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, float(data)
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> None:
+    old = dict(_flatten(before))
+    new = dict(_flatten(after))
+    for key in sorted(old.keys() & new.keys()):
+        if not key.endswith(("_ms", "us_per_call", "throughput_rps", "speedup")):
+            continue
+        a, b = old[key], new[key]
+        if a == 0:
+            continue
+        change = (b - a) / a
+        better = change < 0 if key.endswith(LOWER_IS_BETTER) else change > 0
+        flag = ""
+        if abs(change) >= threshold:
+            flag = "melhor" if better else "PIOR"
+        print(f"{key:<70} {a:>12.3f} {b:>12.3f} {change:>+8.1%} {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark.")
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="variação mínima para marcar (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    compare(
+        json.loads(args.before.read_text(encoding="utf-8")),
+        json.loads(args.after.read_text(encoding="utf-8")),
+        args.threshold,
+    )
+
+
+if __name__ == "__main__":
+    main()
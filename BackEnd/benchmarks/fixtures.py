@@ -0,0 +1,184 @@
+"""
+Páginas HTML de teste no formato do site da prefeitura de Quixadá.
+
+- `fixtures/quixada_list.html` e `fixtures/quixada_detail.html`: páginas
+  gravadas (com os casos difíceis para o parser);
+- `scale_recorded_list(n)`: a listagem gravada replicada até n unidades;
+- `make_units(n)` + `render_list_page` / `render_detail_page`: páginas
+  sintéticas determinísticas, com o ruído que a página real tem (menu,
+  scripts, comentários, links "Visualizar" e rodapé).
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+import html
+import random
+import re
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+TIPOS = [
+    "UNIDADE BÁSICA DE SAÚDE",
+    "UBS",
+    "POSTO DE SAÚDE",
+    "UPA 24H",
+    "CAPS",
+    "CAPS AD",
+    "HOSPITAL",
+    "CENTRO DE ESPECIALIDADES",
+]
+BAIRROS = [
+    "CENTRO",
+    "CAMPO VELHO",
+    "COMBATE",
+    "PLANALTO UNIVERSITÁRIO",
+    "ALTO SÃO FRANCISCO",
+    "JARDIM MONÓLITOS",
+    "BAVIERA",
+    "PUTIÚ",
+    "SÃO JOÃO",
+    "TRIÂNGULO",
+    "JUATAMA",
+    "DOM MAURÍCIO",
+]
+RUAS = [
+    "RUA JOSÉ DE QUEIROZ PESSOA",
+    "RUA BASÍLIO PINTO",
+    "AV. PLÁCIDO CASTELO",
+    "RUA TENENTE COTRIM",
+    "TRAVESSA DA MATRIZ",
+    "RUA EPITÁCIO PESSOA",
+]
+HORARIOS = [
+    "SEG A SEX - 07:00 ÀS 17:00",
+    "SEGUNDA A SEXTA, 07H ÀS 11H E 13H ÀS 17H",
+    "ATENDIMENTO 24 HORAS",
+    None,
+]
+
+
+def make_units(n: int, seed: int = 0, first_id: int = 1) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    units = []
+    for i in range(n):
+        uid = first_id + i
+        bairro = rnd.choice(BAIRROS)
+        tipo = rnd.choice(TIPOS)
+        rua = rnd.choice(RUAS)
+        units.append(
+            {
+                "id": uid,
+                "nome": f"{tipo} {bairro} {uid}",
+                "endereco": f"{rua}, {rnd.randint(1, 2000)} - {bairro}",
+                "horario": rnd.choice(HORARIOS),
+                "email": f"unidade{uid}@quixada.ce.gov.br" if rnd.random() < 0.6 else None,
+            }
+        )
+    return units
+
+
+_HEAD = """<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+<meta charset="utf-8">
+<title>Prefeitura Municipal de Quixadá - Unidades de Saúde</title>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){dataLayer.push(arguments);}</script>
+<style>.card { margin: 4px; }</style>
+</head>
+<body>
+<header>
+  <nav>
+    <ul>
+      <li><a href="index.php">Início</a></li>
+      <li><a href="secretaria.php?id=7">Secretaria de Saúde</a></li>
+      <li><a href="unidadesaude.php">Unidades de Saúde</a></li>
+    </ul>
+  </nav>
+</header>
+<main>
+"""
+
+_LIST_INTRO = """<h1>Unidades de Saúde</h1>
+<p>Confira abaixo a relação das unidades de saúde do município.</p>
+"""
+
+_FOOT = """</main>
+<footer>
+  <p>Prefeitura Municipal de Quixadá - Rua Jesus Maria e José, 1950 - Centro</p>
+  <p>Horário de atendimento: SEG a SEX, 08h às 14h</p>
+  <p>ouvidoria@quixada.ce.gov.br</p>
+  <!-- fim do rodapé -->
+</footer>
+</body>
+</html>
+"""
+
+
+def _esc(text: str) -> str:
+    return html.escape(text, quote=True)
+
+
+def render_list_page(units: List[Dict[str, Any]]) -> str:
+    parts = [_HEAD, _LIST_INTRO]
+    for u in units:
+        href = f"unidadesaude.php?id={u['id']}"
+        parts.append('<div class="col-md-4">\n<div class="card">\n')
+        parts.append(f'  <a href="{href}"><h4 class="card-title">{_esc(u["nome"])}</h4></a>\n')
+        parts.append(f'  <p><i class="fa fa-map-marker"></i> {_esc(u["endereco"])}</p>\n')
+        if u.get("horario"):
+            parts.append(f'  <p><i class="fa fa-clock-o"></i>\n    {_esc(u["horario"])}\n  </p>\n')
+        if u.get("email"):
+            parts.append(f"  <p><small>{_esc(u['email'])}</small></p>\n")
+        parts.append("  <!-- card -->\n")
+        parts.append(f'  <a class="btn btn-primary" href="{href}">Visualizar</a>\n')
+        parts.append("</div>\n</div>\n")
+    parts.append(_FOOT)
+    return "".join(parts)
+
+
+def render_detail_page(unit: Dict[str, Any]) -> str:
+    horario = unit.get("horario") or "Não informado"
+    return (
+        _HEAD
+        + f"""<section class="unidade">
+  <h2>{_esc(unit["nome"])}</h2>
+  <div class="info">
+    <h5>Informações de endereço</h5>
+    <p>{_esc(unit["endereco"])}</p>
+    <h5>Horário de funcionamento</h5>
+    <p>{_esc(horario)}</p>
+  </div>
+  <a href="unidadesaude.php">Voltar</a>
+</section>
+"""
+        + _FOOT
+    )
+
+
+def recorded_list_page() -> str:
+    return (FIXTURES_DIR / "quixada_list.html").read_text(encoding="utf-8")
+
+
+def recorded_detail_page() -> str:
+    return (FIXTURES_DIR / "quixada_detail.html").read_text(encoding="utf-8")
+
+
+_CARD = re.compile(r'<div class="col-md-4">.*?</div></div>\n', re.S)
+_CARD_ID = re.compile(r"id=(\d+)")
+
+
+def scale_recorded_list(n: int) -> str:
+    """Listagem gravada com os cards replicados (e renumerados) até n cards."""
+    page = recorded_list_page()
+    cards = _CARD.findall(page)
+    start = page.index(cards[0])
+    end = page.index(cards[-1]) + len(cards[-1])
+
+    out = []
+    for i in range(n):
+        card = cards[i % len(cards)]
+        offset = (i // len(cards)) * 1000
+        out.append(_CARD_ID.sub(lambda m: f"id={int(m.group(1)) + offset}", card))
+    return page[:start] + "".join(out) + page[end:]
@@ -0,0 +1,99 @@
+"""
+Parser antigo da listagem (app/main.py antes do parser de passada única).
+
+Mantido só como referência: os benchmarks conferem que `app.parser` produz
+exatamente a mesma saída e comparam o tempo de parse dos dois.
+"""
+
+from typing import Any, Dict, List, Optional
+import re
+
+from bs4 import BeautifulSoup
+
+
+DETAIL_URL = "https://quixada.ce.gov.br/unidadesaude.php?id={id}"
+
+
+def _extract_bairro_from_endereco(endereco: Optional[str]) -> Optional[str]:
+    if not endereco:
+        return None
+    parts = [p.strip() for p in endereco.split("-") if p.strip()]
+    if len(parts) < 2:
+        return None
+    cand = parts[1].title()
+    if len(cand) < 3:
+        return None
+    return cand
+
+
+def _infer_tipo(nome: str, endereco: Optional[str], page_text: str) -> str:
+    hay = f"{nome} {endereco or ''} {page_text}".upper()
+
+    if "CAPS" in hay:
+        return "caps"
+    if "UPA" in hay:
+        return "upa"
+    if "HOSPITAL" in hay:
+        return "hospital"
+    if "UBS" in hay or "POSTO" in hay or "UNIDADE BASICA" in hay or "UNIDADE BÁSICA" in hay:
+        return "ubs"
+
+    return "ubs"
+
+
+def scrape_list_unidades(html: str, detail_url: str = DETAIL_URL) -> List[Dict[str, Any]]:
+    soup = BeautifulSoup(html, "lxml")
+    anchors = []
+
+    for a in soup.select('a[href*="unidadesaude.php?id="]'):
+        txt = a.get_text(" ", strip=True)
+        if txt and txt.upper() != "VISUALIZAR":
+            anchors.append(a)
+
+    unidades = []
+
+    for a in anchors:
+        href = a.get("href", "")
+        m = re.search(r"id=(\d+)", href)
+        if not m:
+            continue
+
+        uid = int(m.group(1))
+        nome = a.get_text(" ", strip=True)
+
+        texts = []
+        for el in a.next_elements:
+            if getattr(el, "name", None) == "a":
+                t = el.get_text(" ", strip=True)
+                h = el.get("href", "")
+                if t and t.upper() != "VISUALIZAR" and "unidadesaude.php?id=" in h:
+                    break
+            if isinstance(el, str):
+                t = el.strip()
+                if t:
+                    texts.append(re.sub(r"\s+", " ", t))
+
+        block = " ".join(texts)
+
+        endereco = next((t for t in texts if "RUA" in t.upper()), None)
+        horario = next((t for t in texts if "SEG" in t.upper() or "24" in t), None)
+        email = next((t for t in texts if "@" in t), None)
+
+        bairro = _extract_bairro_from_endereco(endereco)
+        tipo = _infer_tipo(nome, endereco, block)
+
+        unidades.append(
+            {
+                "id": uid,
+                "nome": nome,
+                "tipo": tipo,
+                "endereco": endereco,
+                "bairro": bairro,
+                "horario": horario,
+                "telefone": None,
+                "email": email,
+                "fonteUrl": detail_url.format(id=uid),
+            }
+        )
+
+    return unidades
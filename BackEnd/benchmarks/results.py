@@ -0,0 +1,52 @@
+"""Estatísticas e gravação dos resultados dos benchmarks (JSON comparável entre execuções)."""
+
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+import json
+import platform
+import subprocess
+import sys
+import time
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    lat = sorted(latencies)
+    return {
+        "requests": len(lat),
+        "throughput_rps": round(len(lat) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 99) * 1000, 3),
+        "max_ms": round(lat[-1] * 1000, 3) if lat else 0.0,
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_metadata() -> Dict[str, Any]:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_rev": _git_rev(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def write_results(path: Path, results: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": run_metadata(), **results}, indent=2, ensure_ascii=False), encoding="utf-8")
@@ -0,0 +1,45 @@
+"""
+Roda a suíte inteira (parser, micro-benchmarks e carga) e grava um JSON.
+
+    python -m benchmarks.run                       # grava em var/bench/<data>.json
+    python -m benchmarks.compare antes.json depois.json
+"""
+
+from pathlib import Path
+import argparse
+import asyncio
+import time
+
+from benchmarks import bench_load, bench_micro, bench_parser
+from benchmarks.results import write_results
+
+
+BENCH_DIR = Path(__file__).resolve().parents[1] / "var" / "bench"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do backend.")
+    bench_load.add_arguments(parser)
+    parser.add_argument("--parser-sizes", type=int, nargs="+", default=[100, 500, 1000, 2000])
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    out = args.out or BENCH_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+
+    print("== parser ==")
+    parser_results = bench_parser.run(args.parser_sizes, repeat=3)
+    print("== micro ==")
+    micro_results = bench_micro.run(args.units)
+    print("== carga ==")
+    load_results = asyncio.run(bench_load.run_all(args))
+
+    params = {k: v for k, v in vars(args).items() if k != "out"}
+    write_results(
+        out,
+        {"params": params, "parser": parser_results, "micro": micro_results, "load": load_results},
+    )
+    print(f"Resultados em {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Servidor HTTP local que imita o site da prefeitura (unidadesaude.php).
+
+Serve a listagem e as páginas de detalhe geradas por `fixtures`, para rodar
+o scraper e o crawler sem tocar no site real. Latência e falhas podem ser
+injetadas para simular o site lento ou fora do ar.
+
+    python -m benchmarks.upstream_server --units 300 --port 8765 --latency 0.5 --fail-rate 0.1
+
+O scraper aceita a URL base: http://127.0.0.1:8765/unidadesaude.php
+
+Com `validators=True` (padrão) as páginas levam ETag e Last-Modified e o
+servidor responde 304 a GETs condicionais, como um servidor com cache HTTP.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.utils import formatdate
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import argparse
+import hashlib
+import random
+import threading
+import time
+
+from benchmarks.fixtures import make_units, render_detail_page, render_list_page
+
+
+class UpstreamState:
+    """Conteúdo servido e comportamento do servidor (ajustável em tempo de execução)."""
+
+    def __init__(
+        self,
+        units: List[Dict[str, Any]],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fail_rate: float = 0.0,
+        fail_status: int = 503,
+        seed: int = 0,
+        validators: bool = True,
+    ):
+        self.validators = validators
+        self.not_modified = 0
+        self.set_units(units)
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.requests = 0
+        self.failures = 0
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def set_units(self, units: List[Dict[str, Any]]) -> None:
+        self.units = {u["id"]: u for u in units}
+        self.list_html = render_list_page(units).encode("utf-8")
+        self.detail_html = {uid: render_detail_page(u).encode("utf-8") for uid, u in self.units.items()}
+        self.modified = formatdate(usegmt=True)
+
+    def set_list_html(self, html: str) -> None:
+        # ex.: a listagem gravada (fixtures.scale_recorded_list)
+        self.list_html = html.encode("utf-8")
+        self.modified = formatdate(usegmt=True)
+
+    def next_behavior(self) -> Tuple[float, bool]:
+        """(atraso em segundos, se esta requisição deve falhar)."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.fail_rate > 0 and self._rnd.random() < self.fail_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+
+def _make_handler(state: UpstreamState):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            delay, fail = state.next_behavior()
+            if delay:
+                time.sleep(delay)
+            if fail:
+                self._send(state.fail_status, b"falha injetada")
+                return
+
+            parsed = urlparse(self.path)
+            if parsed.path.rstrip("/") != "/unidadesaude.php":
+                self._send(404, b"not found")
+                return
+
+            ids = parse_qs(parsed.query).get("id")
+            if not ids:
+                self._send_page(state.list_html)
+                return
+            try:
+                body = state.detail_html[int(ids[0])]
+            except (ValueError, KeyError):
+                self._send(404, b"not found")
+                return
+            self._send_page(body)
+
+        def _send_page(self, body: bytes) -> None:
+            if not state.validators:
+                self._send(200, body)
+                return
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers = {"ETag": etag, "Last-Modified": state.modified}
+            if self.headers.get("If-None-Match") == etag:
+                with state._lock:
+                    state.not_modified += 1
+                self._send(304, b"", headers)
+                return
+            self._send(200, body, headers)
+
+        def _send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            if status != 304:
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(
+    units: Optional[List[Dict[str, Any]]] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    **behavior: Any,
+) -> Tuple[ThreadingHTTPServer, UpstreamState, str]:
+    """Sobe o servidor numa thread; devolve (server, state, url da listagem).
+
+    `behavior` vai para UpstreamState (latency, jitter, fail_rate, fail_status, seed, validators).
+    """
+    state = UpstreamState(units if units is not None else make_units(60), **behavior)
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="upstream-stub", daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/unidadesaude.php"
+    return server, state, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso fixo por requisição (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="atraso extra aleatório até N s")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fração de requisições com erro")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--no-validators", action="store_true", help="sem ETag/Last-Modified (nunca responde 304)")
+    args = parser.parse_args()
+
+    server, _, url = start_server(
+        make_units(args.units, seed=args.seed),
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        fail_status=args.fail_status,
+        seed=args.seed,
+        validators=not args.no_validators,
+    )
+    print(f"Servindo {args.units} unidades em {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Fixtures comuns: servidores locais no formato do site da prefeitura
+(benchmarks.upstream_server).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from benchmarks.upstream_server import UpstreamState, start_server
+
+
+@pytest.fixture
+def upstream() -> Callable[..., Tuple[UpstreamState, str]]:
+    """upstream(units, latency=..., fail_rate=...) -> (estado, url da listagem)."""
+    servers = []
+
+    def start(units: Optional[List[Dict[str, Any]]] = None, **behavior: Any) -> Tuple[UpstreamState, str]:
+        server, state, url = start_server(units, **behavior)
+        servers.append(server)
+        return state, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,22 @@
+"""Fontes e caches apontados para os servidores de fixtures dos testes."""
+
+from typing import Any
+
+from app.sources import QuixadaSource
+from app.unidades_cache import UnidadesCache
+
+
+HEADERS = {"User-Agent": "GuiaSaude-Testes/1.0"}
+
+
+def make_source(url: str, slug: str = "quixada") -> QuixadaSource:
+    # sem limite de taxa nem retentativas: fonte fora do ar falha na hora
+    source = QuixadaSource(list_url=url, detail_url=url + "?id={id}", headers=HEADERS, slug=slug, nome=slug, rate=None)
+    source.scraper.client.retries = 0
+    return source
+
+
+def make_cache(url: str, slug: str = "quixada", **kwargs: Any) -> UnidadesCache:
+    kwargs.setdefault("ttl", 3600)
+    kwargs.setdefault("refresh_ahead", 60)
+    return UnidadesCache(loader=make_source(url, slug).load, name=slug, **kwargs)
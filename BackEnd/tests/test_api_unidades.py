@@ -0,0 +1,198 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.catalog import Catalog
+from app.changes import SnapshotHistory, format_version
+from app.snapshot_store import SnapshotStore
+from benchmarks.fixtures import make_units
+from tests.helpers import make_cache, make_source
+
+
+@pytest.fixture
+def api(upstream, monkeypatch):
+    """(cliente, cache, estado do upstream, função que troca as unidades e renova o cache)."""
+    units = make_units(40)
+    state, url = upstream(units)
+    cache = make_cache(url)
+    monkeypatch.setattr(main, "catalog", Catalog({"quixada": cache}))
+    main.unidades_payloads.clear()
+
+    def publish(new_units):
+        state.set_units(new_units)
+        assert cache.refresh()
+
+    yield TestClient(main.app), cache, units, publish
+    main.unidades_payloads.clear()
+
+
+def _edit(units, rename=(), remove=(), add=()):
+    out = [dict(u, nome=u["nome"] + " (novo)") if u["id"] in rename else dict(u) for u in units if u["id"] not in remove]
+    return out + [u for uid in add for u in make_units(1, seed=uid, first_id=uid)]
+
+
+# -------------------------
+# paginação
+# -------------------------
+def test_cursor_pagination_survives_snapshot_change(api):
+    client, _, units, publish = api
+    first = client.get("/api/unidades", params={"limit": 10, "fields": "id"}).json()
+    assert [u["id"] for u in first["itens"]] == list(range(1, 11))
+
+    # entre uma página e outra: some uma unidade já entregue e uma ainda não, entra uma nova
+    publish(_edit(units, remove={3, 25}, add={100}))
+
+    seen, cursor = [u["id"] for u in first["itens"]], first["proximoCursor"]
+    while cursor:
+        page = client.get("/api/unidades", params={"limit": 10, "fields": "id", "cursor": cursor}).json()
+        seen += [u["id"] for u in page["itens"]]
+        cursor = page["proximoCursor"]
+
+    assert len(seen) == len(set(seen))
+    assert seen == list(range(1, 11)) + [i for i in range(11, 41) if i != 25] + [100]
+
+
+def _pages(client, **params):
+    seen, cursor = [], None
+    while True:
+        page = client.get("/api/unidades", params={**params, "fields": "id", "cursor": cursor}).json()
+        seen += [u["id"] for u in page["itens"]]
+        cursor = page["proximoCursor"]
+        if not cursor:
+            return seen
+
+
+def test_paged_listing_matches_unpaged_order(api):
+    client = api[0]
+    for params in ({"tipo": "ubs"}, {"tipo": "UBS"}, {"q": "hospital"}, {"q": "ubs", "tipo": "ubs"}, {"tipo": "nenhum"}):
+        full = [u["id"] for u in client.get("/api/unidades", params=params).json()]
+        # sem busca, a paginação segue (cidade, id); com busca, a mesma ordem de relevância
+        assert _pages(client, limit=7, **params) == (full if "q" in params else sorted(full))
+
+
+def test_invalid_cursor_is_rejected_without_touching_the_payload_cache(api):
+    client = api[0]
+    with_q = client.get("/api/unidades", params={"limit": 1, "q": "ubs"}).json()["proximoCursor"]
+    main.unidades_payloads.clear()
+    # lixo, 1 campo, 3 campos sem busca, objeto, id de outro tipo
+    for cursor in ("lixo", "WyJhIl0", "WzEsMiwzXQ", "e30", "WyJxdWl4YWRhIiwieCJd", with_q):
+        assert client.get("/api/unidades", params={"limit": 10, "cursor": cursor}).status_code == 422
+    assert client.get("/api/unidades", params={"limit": 10, "q": "ubs", "cursor": "WyJxdWl4YWRhIiwxXQ"}).status_code == 422
+    assert not main.unidades_payloads._building
+    assert not main.unidades_payloads._items
+
+
+# -------------------------
+# feed de mudanças
+# -------------------------
+def test_changes_since_version(api):
+    client, _, units, publish = api
+    since = client.get("/api/unidades").headers["X-Versao"]
+
+    publish(_edit(units, rename={2}, remove={5}, add={99}))
+    current = client.get("/api/unidades").headers["X-Versao"]
+    assert current != since
+
+    body = client.get("/api/unidades/changes", params={"since": since}).json()
+    assert body["versao"] == current
+    assert not body["ressincronizar"]
+    assert [u["id"] for u in body["adicionadas"]] == [99]
+    assert [u["id"] for u in body["modificadas"]] == [2]
+    assert body["modificadas"][0]["nome"].endswith("(novo)")
+    assert body["removidas"] == [{"cidade": "quixada", "id": 5}]
+
+    empty = client.get("/api/unidades/changes", params={"since": current}).json()
+    assert (empty["adicionadas"], empty["modificadas"], empty["removidas"]) == ([], [], [])
+
+
+def test_changes_resync_when_version_left_the_history(api):
+    client, cache, units, publish = api
+    cache.history = SnapshotHistory(size=2)
+    cache.history.record(cache.get().snapshot)
+    since = client.get("/api/unidades").headers["X-Versao"]
+
+    for i in range(3):
+        publish(_edit(units, rename={i + 1}))
+
+    body = client.get("/api/unidades/changes", params={"since": since}).json()
+    assert body["ressincronizar"]
+    assert len(body["adicionadas"]) == 40
+
+    # sem `since` ou com hash de outra linhagem: catálogo inteiro
+    assert client.get("/api/unidades/changes").json()["ressincronizar"]
+    other = since[:-1] + ("0" if since[-1] != "0" else "1")
+    assert client.get("/api/unidades/changes", params={"since": other}).json()["ressincronizar"]
+    assert client.get("/api/unidades/changes", params={"since": "lixo"}).status_code == 422
+
+
+def test_changes_fall_back_to_snapshot_store(upstream, tmp_path, monkeypatch):
+    units = make_units(30)
+    state, url = upstream(units)
+    db = tmp_path / "unidades.sqlite3"
+    writer = make_cache(url, store=SnapshotStore(db))
+    writer.get()
+    since = format_version(writer.get().versions)
+    state.set_units(_edit(units, rename={7}))
+    assert writer.refresh()
+
+    # outro worker (anel vazio) recebe o token gerado pelo primeiro
+    reader = make_cache(url, store=SnapshotStore(db))
+    monkeypatch.setattr(main, "catalog", Catalog({"quixada": reader}))
+    main.unidades_payloads.clear()
+    body = TestClient(main.app).get("/api/unidades/changes", params={"since": since}).json()
+    assert not body["ressincronizar"]
+    assert [u["id"] for u in body["modificadas"]] == [7]
+
+
+def test_health_reports_snapshot_store_failure(api, tmp_path, monkeypatch):
+    client, cache = api[0], api[1]
+    # diretório do snapshot "bloqueado" por um arquivo
+    blocker = tmp_path / "arquivo"
+    blocker.write_text("")
+    monkeypatch.setattr(main, "SNAPSHOT_DB_PATH", str(blocker / "unidades.sqlite3"))
+    monkeypatch.setattr(main, "snapshot_store_errors", {})
+    assert main._open_snapshot_store("quixada") is None
+
+    fonte = client.get("/api/health").json()["fontes"]["quixada"]
+    assert fonte["snapshotCompartilhado"] is False
+    assert "arquivo" in fonte["erroSnapshot"]
+
+    cache.store = SnapshotStore(tmp_path / "ok.sqlite3")
+    main.snapshot_store_errors.clear()
+    body = client.get("/api/health").json()
+    assert body["unidades"]["snapshotCompartilhado"] is True
+    assert body["fontes"]["quixada"]["erroSnapshot"] is None
+
+
+def test_legacy_snapshot_file_is_imported_for_the_first_source(upstream, tmp_path, monkeypatch):
+    state, url = upstream(make_units(20))
+    source = make_source(url)
+    # arquivo de antes das várias cidades: sem `-quixada` e sem `cidade` nas unidades
+    legacy = tmp_path / "unidades.sqlite3"
+    old_units = [{k: v for k, v in u.items() if k != "cidade"} for u in source.load()]
+    saved = SnapshotStore(legacy).save(old_units, ts=time.time() - 60)
+    monkeypatch.setattr(main, "SNAPSHOT_DB_PATH", str(legacy))
+    requests_before = state.requests
+
+    store = main._open_snapshot_store("quixada")
+    assert store.path.name == "unidades-quixada.sqlite3"
+    main._import_legacy_snapshot(store, source)
+    main._import_legacy_snapshot(store, source)
+
+    cache = make_cache(url, store=store)
+    read = cache.get()
+    assert not read.stale
+    assert read.snapshot.ts == saved.ts
+    assert {u["cidade"] for u in read.snapshot.unidades} == {"quixada"}
+    assert state.requests == requests_before
+    assert SnapshotStore(legacy).latest().hash == saved.hash
+
+
+def test_cors_exposes_snapshot_headers(api):
+    client = api[0]
+    resp = client.get("/api/unidades", params={"formato": "ndjson", "limit": 5}, headers={"Origin": "https://guia-saude-front-end.vercel.app"})
+    exposed = {h.strip() for h in resp.headers["access-control-expose-headers"].split(",")}
+    assert {"X-Snapshot-Age", "X-Cidades-Indisponiveis", "X-Versao", "X-Next-Cursor"} <= exposed
+    assert "X-Next-Cursor" in resp.headers
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from app.catalog import Catalog, UnknownCityError
+from benchmarks.fixtures import make_units
+from tests.helpers import make_cache
+
+
+def _catalog(upstream, behaviors, cold_wait=10.0):
+    caches = {}
+    for i, behavior in enumerate(behaviors):
+        _, url = upstream(make_units(20, seed=i), **behavior)
+        caches[f"c{i}"] = make_cache(url, f"c{i}")
+    return Catalog(caches, cold_wait=cold_wait)
+
+
+def _cidades(read):
+    return {u["cidade"] for u in read.snapshot.unidades}
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.05)
+
+
+def test_merged_read_does_not_wait_for_cold_sources(upstream):
+    catalog = _catalog(upstream, [{}, {"latency": 1.5}, {"fail_rate": 1.0}])
+    catalog.caches["c0"].get()
+
+    t0 = time.monotonic()
+    read = catalog.read()
+    assert time.monotonic() - t0 < 0.5
+    assert _cidades(read) == {"c0"}
+    assert read.missing == ("c1", "c2")
+
+    # a fonte lenta termina em background; a fora do ar continua de fora
+    _wait_for(lambda: catalog.caches["c1"].snapshot is not None)
+    read = catalog.read()
+    assert _cidades(read) == {"c0", "c1"}
+    assert read.missing == ("c2",)
+    assert len(read.snapshot.unidades) == 40
+
+
+def test_cold_merged_read_returns_with_first_ready_source(upstream):
+    catalog = _catalog(upstream, [{}, {"latency": 3.0}])
+
+    t0 = time.monotonic()
+    read = catalog.read()
+    assert time.monotonic() - t0 < 2.0
+    assert _cidades(read) == {"c0"}
+    assert read.missing == ("c1",)
+
+
+def test_cold_merged_read_fails_when_every_source_is_down(upstream):
+    catalog = _catalog(upstream, [{"fail_rate": 1.0}, {"fail_rate": 1.0}], cold_wait=2.0)
+    with pytest.raises(RuntimeError):
+        catalog.read()
+
+
+def test_city_filter(upstream):
+    catalog = _catalog(upstream, [{}, {}])
+    read = catalog.read("C1")
+    assert _cidades(read) == {"c1"}
+    assert read.missing == ()
+    with pytest.raises(UnknownCityError):
+        catalog.read("recife")
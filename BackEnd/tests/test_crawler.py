@@ -0,0 +1,70 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from app.upstream import UpstreamClient
+from benchmarks.fixtures import make_units
+
+
+SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "scrape_unidades.py"
+
+
+@pytest.fixture(scope="module")
+def scraper():
+    spec = importlib.util.spec_from_file_location("scrape_unidades", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _crawl(scraper, ids, checkpoint, url):
+    client = UpstreamClient(headers={"User-Agent": "GuiaSaude-Testes/1.0"}, retries=0)
+    return asyncio.run(scraper.crawl(ids, checkpoint, url, concurrency=4, client=client))
+
+
+def test_crawler_resumes_interrupted_run_and_revalidates_finished_one(scraper, upstream, tmp_path):
+    state, url = upstream(make_units(12))
+    ids = list(range(1, 13))
+    path = tmp_path / "checkpoint.jsonl"
+
+    # primeira execução "interrompida" depois de 5 unidades
+    checkpoint = scraper.Checkpoint(path)
+    assert not checkpoint.start()
+    stats = _crawl(scraper, ids[:5], checkpoint, url)
+    assert stats["fetched"] == 5
+
+    # retomada: só o que faltou vai ao site
+    before = state.requests
+    checkpoint = scraper.Checkpoint(path)
+    assert checkpoint.start()
+    stats = _crawl(scraper, ids, checkpoint, url)
+    assert (stats["resumed"], stats["fetched"], stats["errors"]) == (5, 7, 0)
+    assert state.requests - before == 7
+    checkpoint.finish(ids)
+    assert [checkpoint.units[i]["data"]["id"] for i in ids] == ids
+
+    # execução nova: GET condicional, nada mudou
+    checkpoint = scraper.Checkpoint(path)
+    assert not checkpoint.start()
+    stats = _crawl(scraper, ids, checkpoint, url)
+    assert (stats["unchanged"], stats["fetched"]) == (12, 0)
+    assert state.not_modified == 12
+
+
+def test_crawler_keeps_failed_units_for_the_next_run(scraper, upstream, tmp_path):
+    state, url = upstream(make_units(12), fail_rate=1.0)
+    ids = list(range(1, 13))
+    path = tmp_path / "checkpoint.jsonl"
+
+    checkpoint = scraper.Checkpoint(path)
+    checkpoint.start()
+    stats = _crawl(scraper, ids, checkpoint, url)
+    assert stats["errors"] == 12
+
+    state.fail_rate = 0.0
+    checkpoint = scraper.Checkpoint(path)
+    assert checkpoint.start()
+    stats = _crawl(scraper, ids, checkpoint, url)
+    assert (stats["fetched"], stats["errors"]) == (12, 0)
@@ -0,0 +1,79 @@
+import math
+import random
+
+import pytest
+
+from app.geo import EARTH_RADIUS_KM, GeoIndex, add_coords
+
+
+TIPOS = ("ubs", "upa", "caps", "hospital")
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _units(n, seed=0):
+    rnd = random.Random(seed)
+    units = []
+    for i in range(n):
+        # um pouco fora de Quixadá também, e algumas sem coordenadas
+        lat, lon = rnd.uniform(-6.0, -4.0), rnd.uniform(-40.0, -38.0)
+        if i % 17 == 0:
+            lat = lon = None
+        units.append({"id": i, "tipo": rnd.choice(TIPOS).upper(), "lat": lat, "lon": lon})
+    return units
+
+
+def _brute_force(units, lat, lon, k, tipo=None):
+    dists = sorted(
+        (_haversine_km(lat, lon, u["lat"], u["lon"]), u["id"])
+        for u in units
+        if u["lat"] is not None and (tipo is None or u["tipo"].lower() == tipo)
+    )
+    return dists[:k]
+
+
+@pytest.mark.parametrize("k", [1, 5, 50])
+@pytest.mark.parametrize("tipo", [None, "ubs", "caps"])
+def test_kdtree_matches_brute_force_haversine(k, tipo):
+    units = _units(2000)
+    index = GeoIndex(units)
+    rnd = random.Random(k)
+    for _ in range(50):
+        lat, lon = rnd.uniform(-6.5, -3.5), rnd.uniform(-40.5, -37.5)
+        found = index.nearest(lat, lon, k, tipo)
+        expected = _brute_force(units, lat, lon, k, tipo)
+
+        # coordenadas aleatórias: sem empates de distância
+        assert [u["id"] for u in found] == [uid for _, uid in expected]
+        assert [u["distanciaKm"] for u in found] == pytest.approx([d for d, _ in expected], abs=1e-3)
+
+
+def test_units_without_coords_and_unknown_tipo():
+    units = _units(40)
+    index = GeoIndex(units)
+    found = index.nearest(-5.0, -39.0, 100)
+    assert len(found) == sum(u["lat"] is not None for u in units)
+    assert index.nearest(-5.0, -39.0, 5, tipo="Farmácia") == []
+    assert GeoIndex([]).nearest(-5.0, -39.0, 5) == []
+    # o snapshot não é alterado pela resposta
+    assert "distanciaKm" not in units[1]
+
+
+def test_add_coords_for_quixada():
+    units = add_coords(
+        [
+            {"id": 9001, "bairro": "Campo Velho", "endereco": None},
+            {"id": 9002, "bairro": None, "endereco": "RUA DO CENTRO, 10 - JUATAMA"},
+            {"id": 9003, "bairro": None, "endereco": "Rua sem bairro conhecido"},
+        ]
+    )
+    assert units[0]["coordPrecisao"] == "bairro" and units[0]["lat"] is not None
+    # o bairro vem depois do " - ", mesmo com "centro" no nome da rua
+    juatama = add_coords([{"id": 9004, "bairro": "Juatama"}])[0]
+    assert (units[1]["lat"], units[1]["lon"]) == (juatama["lat"], juatama["lon"])
+    assert (units[2]["lat"], units[2]["lon"], units[2]["coordPrecisao"]) == (None, None, None)
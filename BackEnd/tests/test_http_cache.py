@@ -0,0 +1,66 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.data.sintomas import SINTOMAS
+from app.http_cache import payload_from_bytes
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def _get(client, encoding, **headers):
+    return client.get("/api/sintomas", headers={"Accept-Encoding": encoding, **headers})
+
+
+def test_encoding_choice(client):
+    br = _get(client, "gzip, br")
+    assert br.headers["content-encoding"] == "br"
+    assert br.headers["vary"] == "Accept-Encoding"
+    assert br.json() == SINTOMAS
+
+    gz = _get(client, "gzip")
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.json() == SINTOMAS
+
+    # q=0 recusa a codificação
+    assert _get(client, "br;q=0, gzip").headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in _get(client, "identity").headers
+
+
+def test_etag_per_variant(client):
+    etags = {enc: _get(client, enc).headers["etag"] for enc in ("identity", "gzip", "br")}
+    assert len(set(etags.values())) == 3
+    assert etags["gzip"] == etags["identity"][:-1] + '-gzip"'
+    # o ETag muda só quando os bytes mudam
+    assert _get(client, "gzip").headers["etag"] == etags["gzip"]
+
+
+def test_if_none_match_returns_304(client):
+    etag = _get(client, "gzip").headers["etag"]
+
+    resp = _get(client, "gzip", **{"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+    # fraco, em lista, ou de outra codificação do mesmo conteúdo: também 304
+    assert _get(client, "gzip", **{"If-None-Match": f'"x", W/{etag}'}).status_code == 304
+    assert _get(client, "identity", **{"If-None-Match": etag}).status_code == 304
+    assert _get(client, "gzip", **{"If-None-Match": '"outro"'}).status_code == 200
+
+
+def test_small_payloads_are_not_compressed():
+    small = payload_from_bytes(b'{"a":1}')
+    assert set(small.variants) == {"identity"}
+
+    body = json.dumps(SINTOMAS).encode("utf-8")
+    big = payload_from_bytes(body)
+    assert gzip.decompress(big.variants["gzip"]) == body
+    # mtime=0: a mesma entrada gera os mesmos bytes (e o mesmo ETag) em todo worker
+    assert payload_from_bytes(body).variants["gzip"] == big.variants["gzip"]
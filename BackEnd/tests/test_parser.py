@@ -0,0 +1,36 @@
+import pytest
+
+from app.parser import parse_list_unidades
+from benchmarks.fixtures import make_units, recorded_list_page, render_list_page, scale_recorded_list
+from benchmarks.legacy_parser import DETAIL_URL, scrape_list_unidades
+
+
+PAGES = {
+    "gravada": recorded_list_page,
+    "gravada x3": lambda: scale_recorded_list(3 * len(parse_list_unidades(recorded_list_page(), DETAIL_URL))),
+    "sintetica": lambda: render_list_page(make_units(200, seed=7)),
+    "vazia": lambda: render_list_page([]),
+}
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_single_pass_parser_matches_legacy_parser(name):
+    html = PAGES[name]()
+    new = parse_list_unidades(html, DETAIL_URL)
+    assert new == scrape_list_unidades(html, DETAIL_URL)
+    # bytes (como chegam do upstream) dão o mesmo resultado
+    assert parse_list_unidades(html.encode("utf-8"), DETAIL_URL) == new
+
+
+def test_recorded_page_fields():
+    unidades = parse_list_unidades(recorded_list_page(), DETAIL_URL)
+    assert unidades
+    assert len({u["id"] for u in unidades}) == len(unidades)
+    for u in unidades:
+        assert u["nome"] and u["tipo"]
+        assert u["fonteUrl"] == DETAIL_URL.format(id=u["id"])
+
+
+def test_garbage_input():
+    assert parse_list_unidades("", DETAIL_URL) == []
+    assert parse_list_unidades("<html><body><p>sem unidades</p></body></html>", DETAIL_URL) == []
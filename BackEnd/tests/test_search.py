@@ -0,0 +1,48 @@
+from app.search import UnidadesIndex, normalize
+
+
+UNIDADES = [
+    {"id": 1, "nome": "UNIDADE BÁSICA DE SAÚDE CAMPO VELHO", "tipo": "UBS", "bairro": "Campo Velho", "endereco": "Rua A, 10"},
+    {"id": 2, "nome": "HOSPITAL MATERNIDADE JESUS MARIA JOSÉ", "tipo": "Hospital", "bairro": "Centro", "endereco": None},
+    {"id": 3, "nome": "CAPS GERAL", "tipo": "CAPS", "bairro": None, "endereco": "Rua São João, 200"},
+    {"id": 4, "nome": "UBS CENTRO", "tipo": "UBS", "bairro": "Centro", "endereco": "Praça José de Barros"},
+]
+
+
+def _ids(found):
+    return [u["id"] for u in found]
+
+
+def test_normalize_folds_case_and_accents():
+    assert normalize("  Saúde   BÁSICA ") == "saude basica"
+    assert normalize(None) == ""
+
+
+def test_search_is_accent_and_case_insensitive():
+    index = UnidadesIndex(UNIDADES)
+    assert _ids(index.search(q="basica")) == [1]
+    assert _ids(index.search(q="SAO JOAO")) == [3]
+    assert _ids(index.search(q="jose")) == [2, 4]
+    assert _ids(index.search(tipo="ubs")) == [1, 4]
+    assert _ids(index.search(q="centro", tipo="UBS")) == [4]
+
+
+def test_missing_fields_do_not_match_the_text_none():
+    index = UnidadesIndex(UNIDADES)
+    assert index.search(q="none") == []
+    assert index.search(q="non") == []
+
+
+def test_ranking_prefers_name_matches():
+    index = UnidadesIndex(UNIDADES)
+    # "centro" no nome da 4 e só no bairro da 2
+    assert _ids(index.search(q="centro")) == [4, 2]
+
+
+def test_typo_falls_back_to_fuzzy_search():
+    index = UnidadesIndex(UNIDADES)
+    assert _ids(index.search(q="maternidadi")) == [2]
+    assert _ids(index.search(q="hopsital maternidade")) == [2]
+    # a busca exata, quando acha algo, não mistura resultados aproximados
+    assert _ids(index.search(q="caps")) == [3]
+    assert index.search(q="xyzw") == []
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from app.sources import ListPageSource
+from tests.helpers import HEADERS
+
+
+class SemCoordenadas(ListPageSource):
+    def parse(self, html: str) -> List[Dict[str, Any]]:
+        return []
+
+
+def test_adapter_without_add_coords_fails_at_construction():
+    with pytest.raises(TypeError, match="add_coords"):
+        SemCoordenadas("recife", "Recife", "http://127.0.0.1/unidades", HEADERS)
+
+    class Completa(SemCoordenadas):
+        def add_coords(self, unidades):
+            return unidades
+
+    source = Completa("recife", "Recife", "http://127.0.0.1/unidades", HEADERS)
+    assert source.prepare([{"id": 1}]) == [{"id": 1, "cidade": "recife"}]
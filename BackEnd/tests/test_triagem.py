@@ -0,0 +1,86 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.data.orientacoes import ORIENTACOES
+from app.data.sintomas import SINTOMAS
+from app.triagem import CATEGORIA_SAUDE_MENTAL, LIMIAR_UPA, TriagemCompilada
+
+
+CATALOGO = [
+    {"id": "febre", "peso": 2, "categoria": "Geral"},
+    {"id": "tosse", "peso": 1, "categoria": "Respiratório"},
+    {"id": "dor_peito", "peso": 3, "categoria": "Geral"},
+    {"id": "falta_ar", "peso": 3, "categoria": "Respiratório"},
+    {"id": "ansiedade", "peso": 2, "categoria": CATEGORIA_SAUDE_MENTAL},
+]
+ORIENT = {"sinaisAlerta": ["dor_peito"], "mensagens": {"emergencia": "E", "caps": "C", "upa": "U", "ubs": "B"}}
+
+
+@pytest.fixture(scope="module")
+def triagem():
+    return TriagemCompilada(CATALOGO, ORIENT)
+
+
+@pytest.mark.parametrize(
+    "sintomas, destino, peso",
+    [
+        (["febre", "dor_peito"], "emergencia", 5),  # sinal de alerta vence tudo
+        (["ansiedade"], "caps", 2),
+        (["ansiedade", "febre"], "caps", 4),  # saúde mental pesa tanto quanto o resto
+        (["ansiedade", "febre", "tosse"], "upa", 5),  # ... e aqui menos
+        (["febre", "falta_ar"], "upa", 5),
+        (["febre", "tosse"], "ubs", 3),
+        ([], "ubs", 0),
+    ],
+)
+def test_destination_rules(triagem, sintomas, destino, peso):
+    assert LIMIAR_UPA == 5
+    result = triagem.avaliar(sintomas)
+    assert (result["destino"], result["peso"]) == (destino, peso)
+    assert result["mensagem"] == ORIENT["mensagens"][destino]
+    assert result["alerta"] == (destino == "emergencia")
+
+
+def test_unknown_and_repeated_ids(triagem):
+    result = triagem.avaliar(["febre", "febre", "inexistente", "tosse", "outro"])
+    assert result["peso"] == 3
+    assert result["ignorados"] == ["inexistente", "outro"]
+    assert triagem.avaliar(["inexistente"])["destino"] == "ubs"
+
+
+def _reference(sintomas):
+    # a regra do módulo, item a item e sem numpy
+    por_id = {s["id"]: s for s in SINTOMAS}
+    validos = {s for s in sintomas if s in por_id}
+    peso = sum(por_id[s].get("peso", 0) for s in validos)
+    mental = sum(por_id[s].get("peso", 0) for s in validos if por_id[s].get("categoria") == CATEGORIA_SAUDE_MENTAL)
+    if validos & set(ORIENTACOES["sinaisAlerta"]):
+        return "emergencia", peso
+    if mental > 0 and mental >= peso - mental:
+        return "caps", peso
+    return ("upa" if peso >= LIMIAR_UPA else "ubs"), peso
+
+
+def test_batch_matches_item_by_item_rule():
+    triagem = TriagemCompilada(SINTOMAS, ORIENTACOES)
+    ids = [s["id"] for s in SINTOMAS] + ["desconhecido"]
+    rnd = random.Random(3)
+    lotes = [rnd.sample(ids, rnd.randint(0, 6)) for _ in range(500)]
+
+    resultados = triagem.avaliar_lote(lotes)
+    assert [(r["destino"], r["peso"]) for r in resultados] == [_reference(lista) for lista in lotes]
+    assert resultados[:5] == [triagem.avaliar(lista) for lista in lotes[:5]]
+
+
+def test_endpoint_validation():
+    client = TestClient(main.app)
+    assert client.post("/api/triagem", json={}).status_code == 422
+    assert client.post("/api/triagem", json={"sintomas": [], "lotes": []}).status_code == 422
+
+    item = client.post("/api/triagem", json={"sintomas": ["febre"]}).json()
+    lote = client.post("/api/triagem", json={"lotes": [["febre"], []]}).json()
+    assert lote["resultados"][0] == item
+    assert len(lote["resultados"]) == 2
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from app import unidades_cache
+from app.snapshot_store import SnapshotStore
+from benchmarks.fixtures import make_units
+from tests.helpers import make_cache, make_source
+
+
+def test_second_worker_adopts_snapshot_while_lease_is_held(upstream, tmp_path):
+    state, url = upstream(make_units(20), latency=0.5)
+    db = tmp_path / "unidades.sqlite3"
+    a = make_cache(url, store=SnapshotStore(db))
+    b = make_cache(url, store=SnapshotStore(db))
+
+    t = threading.Thread(target=a.get)
+    t.start()
+    time.sleep(0.2)  # a já está com a lease, esperando o site
+    read = b.get()
+    t.join()
+
+    # b esperou a lease e adotou o snapshot gravado por a, sem ir ao site
+    assert state.requests == 1
+    assert read.snapshot.hash == a.snapshot.hash
+    assert read.snapshot.version == a.snapshot.version
+
+
+def test_stale_reads_back_off_while_another_worker_holds_the_lease(upstream, tmp_path, monkeypatch):
+    state, url = upstream(make_units(20))
+    store = SnapshotStore(tmp_path / "unidades.sqlite3")
+    # snapshot velho em disco, e outro worker com a lease
+    store.save(make_source(url).load(), ts=time.time() - 7200)
+    holder = SnapshotStore(store.path)
+    assert holder.acquire_lease("quixada", ttl=120)
+    requests_before = state.requests
+
+    started = []
+
+    class CountingThread(threading.Thread):
+        def start(self):
+            started.append(self.name)
+            super().start()
+
+    monkeypatch.setattr(unidades_cache.threading, "Thread", CountingThread)
+    cache = make_cache(url, store=SnapshotStore(store.path))
+
+    assert cache.get().stale
+    for t in list(threading.enumerate()):
+        if t.name.startswith("refresh-"):
+            t.join()
+    for _ in range(20):
+        assert cache.get().stale
+    readers = [threading.Thread(target=cache.get) for _ in range(50)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+
+    assert [n for n in started if n.startswith("refresh-")] == ["refresh-quixada"]
+    assert state.requests == requests_before
+
+    # lease liberada: o próximo refresh vai ao site e renova
+    holder.release_lease("quixada")
+    assert cache.refresh()
+    assert not cache.get().stale
+    assert state.requests == requests_before + 1
+
+
+def test_derived_structures_are_built_once_per_snapshot():
+    snap = unidades_cache.UnidadesSnapshot(unidades=make_units(10), ts=time.time(), version=1, hash="h")
+    builds = []
+
+    def build(unidades):
+        builds.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return len(unidades)
+
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(snap.get_derived("idx", build))) for _ in range(16)]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join()
+
+    assert len(builds) == 1
+    assert results == [10] * 16
+    assert not snap.derived._building
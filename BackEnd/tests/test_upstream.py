@@ -0,0 +1,119 @@
+import time
+
+import pytest
+import requests
+
+from app.metrics import UPSTREAM_RETRIES
+from app.parser import parse_list_unidades
+from app.scraper import ListScraper
+from app.upstream import CircuitBreaker, CircuitOpenError, UpstreamClient
+from benchmarks.fixtures import make_units
+
+
+HEADERS = {"User-Agent": "GuiaSaude-Testes/1.0"}
+
+
+def _client(**kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    return UpstreamClient(headers=HEADERS, **kwargs)
+
+
+def test_deadline_bounds_each_attempt(upstream):
+    state, url = upstream(make_units(3), latency=3.0)
+    client = _client(timeout=2.0, deadline=3.0)
+
+    t0 = time.monotonic()
+    with pytest.raises(requests.RequestException):
+        client.fetch(url)
+    assert time.monotonic() - t0 < 3.5
+    assert state.requests == 2
+
+
+def _retries(name):
+    return UPSTREAM_RETRIES.values.get((("fonte", name),), 0)
+
+
+def test_transient_errors_are_retried_and_counted(upstream):
+    state, url = upstream(make_units(3), fail_rate=1.0)
+    client = _client(retries=2, name="teste-retry")
+
+    with pytest.raises(requests.HTTPError):
+        client.fetch(url)
+    assert state.requests == 3
+    assert _retries("teste-retry") == 2
+
+    # 4xx: sem retentativa, e o circuito não conta como falha
+    state.fail_status = 404
+    with pytest.raises(requests.HTTPError):
+        client.fetch(url)
+    assert state.requests == 4
+    assert _retries("teste-retry") == 2
+    assert not client.breaker.is_open
+
+
+def test_circuit_breaker_opens_and_probes_once_after_cooldown(upstream):
+    state, url = upstream(make_units(3), fail_rate=1.0)
+    client = _client(retries=0, breaker=CircuitBreaker(failure_threshold=2, cooldown=0.3))
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.fetch(url)
+    assert client.breaker.is_open
+
+    # aberto: falha na hora, sem ir ao site
+    with pytest.raises(CircuitOpenError):
+        client.fetch(url)
+    assert state.requests == 2
+
+    # meio-aberto: uma tentativa de teste; se falha, abre de novo
+    time.sleep(0.35)
+    with pytest.raises(requests.HTTPError):
+        client.fetch(url)
+    assert state.requests == 3
+    with pytest.raises(CircuitOpenError):
+        client.fetch(url)
+
+    # só uma chamada testa o upstream; as demais seguem barradas até ela terminar
+    time.sleep(0.35)
+    client.breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        client.breaker.allow()
+    client.breaker.record_failure()
+
+    time.sleep(0.35)
+    state.fail_rate = 0.0
+    assert client.fetch(url).status == 200
+    assert not client.breaker.is_open
+
+
+def test_not_modified_listing_skips_the_parse(upstream):
+    state, url = upstream(make_units(10))
+    parses = []
+
+    def parse(html):
+        parses.append(len(html))
+        return parse_list_unidades(html, url + "?id={id}")
+
+    scraper = ListScraper(HEADERS, name="teste-304")
+    first = scraper.scrape(url, parse)
+    assert scraper.scrape(url, parse) is first
+    assert (len(parses), state.not_modified) == (1, 1)
+
+    state.set_units(make_units(11))
+    assert len(scraper.scrape(url, parse)) == 11
+    assert len(parses) == 2
+
+
+def test_identical_listing_without_validators_skips_the_parse(upstream):
+    state, url = upstream(make_units(10), validators=False)
+    parses = []
+    scraper = ListScraper(HEADERS, name="teste-hash")
+
+    def parse(html):
+        parses.append(len(html))
+        return parse_list_unidades(html, url + "?id={id}")
+
+    first = scraper.scrape(url, parse)
+    assert scraper.scrape(url, parse) is first
+    assert len(parses) == 1
+    assert state.not_modified == 0
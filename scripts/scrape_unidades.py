@@ -1,27 +1,58 @@
-import re
-import time
+import argparse
+import asyncio
+import hashlib
 import json
 import pprint
+import re
+import sys
+import uuid
 from pathlib import Path
 
-import requests
 from bs4 import BeautifulSoup
 
 BASE = "https://quixada.ce.gov.br/unidadesaude.php"
 UA = {"User-Agent": "GuiaSaude-Academic/1.0"}
 
+BACKEND = Path(__file__).resolve().parents[1] / "BackEnd"
+sys.path.insert(0, str(BACKEND))
+
+from app.seed import write_seed  # noqa: E402
+from app.sources import DEFAULT_BURST, DEFAULT_RATE, QuixadaSource  # noqa: E402
+from app.upstream import UpstreamClient, Validators  # noqa: E402
+
 # Vai sobrescrever este arquivo:
-OUT_PY = Path(__file__).resolve().parents[1] / "app" / "data" / "unidades.py"
+OUT_PY = BACKEND / "app" / "data" / "unidades.py"
+# Seed snapshot que a API carrega no boot (mesmo formato de /api/unidades)
+SEED = BACKEND / "app" / "data" / "unidades_seed-quixada.json.gz"
+# Progresso por unidade, para retomar uma execução interrompida
+CHECKPOINT = BACKEND / "var" / "scrape_checkpoint.jsonl"
+
+# Padrão "educado" com o servidor da prefeitura (taxa: a mesma das fontes da API)
+DEFAULT_CONCURRENCY = 4
+
+
+def make_upstream(rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST) -> UpstreamClient:
+    # mesmo cliente da API: keep-alive, retentativas com jitter, circuit breaker e
+    # limite de taxa (aplicado a cada tentativa, inclusive às retentativas)
+    return UpstreamClient(headers=UA, rate=rate, burst=burst, name="quixada")
+
+
+upstream = make_upstream()
+
+
+def fetch_text(url: str) -> str:
+    return upstream.get_text(url)
 
 
 def fetch_html(url: str) -> BeautifulSoup:
-    r = requests.get(url, headers=UA, timeout=20)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "lxml")
+    return BeautifulSoup(fetch_text(url), "lxml")
+
+
+def scrape_ids(base: str = BASE) -> list[int]:
+    return ids_from_list(fetch_html(base))
 
 
-def scrape_ids() -> list[int]:
-    soup = fetch_html(BASE)
+def ids_from_list(soup: BeautifulSoup) -> list[int]:
     ids = set()
 
     for a in soup.select('a[href*="unidadesaude.php?id="]'):
@@ -61,9 +92,8 @@ def guess_title(soup: BeautifulSoup) -> str | None:
     return None
 
 
-def scrape_detail(unit_id: int) -> dict:
-    url = f"{BASE}?id={unit_id}"
-    soup = fetch_html(url)
+def parse_detail(unit_id: int, url: str, html: str) -> dict:
+    soup = BeautifulSoup(html, "lxml")
 
     nome = guess_title(soup) or f"Unidade {unit_id}"
     endereco = pick_first_meaningful_text(soup, r"Informações de endereço")
@@ -72,7 +102,7 @@ def scrape_detail(unit_id: int) -> dict:
     return {
         "id": unit_id,
         "nome": nome,
-        "tipo": "ubs",  
+        "tipo": "ubs",
         "endereco": endereco,
         "bairro": None,
         "horario": horario,
@@ -82,7 +112,158 @@ def scrape_detail(unit_id: int) -> dict:
     }
 
 
-def write_unidades_py(unidades: list[dict]):
+def scrape_detail(unit_id: int, base: str = BASE) -> dict:
+    url = f"{base}?id={unit_id}"
+    return parse_detail(unit_id, url, fetch_text(url))
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# Checkpoint
+# -------------------------
+class Checkpoint:
+    """
+    Arquivo JSONL com uma linha por evento:
+      {"type": "run", "run": ...}                    início de uma execução
+      {"type": "unit", "run": ..., "id": ..., ...}   unidade concluída
+      {"type": "done", "run": ...}                   execução terminada
+
+    Se a última execução não terminou, ela é retomada: as unidades já
+    concluídas nela não são buscadas de novo. Em execuções novas, a busca é
+    condicional (ETag/Last-Modified guardados no checkpoint) e páginas com
+    304 ou com o mesmo hash de conteúdo reaproveitam o resultado anterior.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.run: str | None = None
+        self.complete = True
+        self.units: dict[int, dict] = {}
+
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # linha truncada por uma interrupção
+                if rec.get("type") == "run":
+                    self.run, self.complete = rec["run"], False
+                elif rec.get("type") == "done" and rec.get("run") == self.run:
+                    self.complete = True
+                elif rec.get("type") == "unit":
+                    self.units[rec["id"]] = rec
+
+        self._fh = None
+
+    def start(self) -> bool:
+        """Abre o checkpoint; retorna True se está retomando uma execução."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        resuming = self.run is not None and not self.complete
+        self._fh = self.path.open("a", encoding="utf-8")
+        if not resuming:
+            self.run = uuid.uuid4().hex
+            self.complete = False
+            self._write({"type": "run", "run": self.run})
+        return resuming
+
+    def done_in_this_run(self, unit_id: int) -> bool:
+        rec = self.units.get(unit_id)
+        return rec is not None and rec.get("run") == self.run
+
+    def validators(self, unit_id: int) -> Validators | None:
+        rec = self.units.get(unit_id)
+        if rec is None:
+            return None
+        return Validators(rec.get("etag"), rec.get("lastModified")) or None
+
+    def record(self, unit_id: int, page_hash: str, data: dict, validators: Validators | None = None):
+        rec = {"type": "unit", "run": self.run, "id": unit_id, "hash": page_hash, "data": data}
+        if validators:
+            rec["etag"], rec["lastModified"] = validators.etag, validators.last_modified
+        self.units[unit_id] = rec
+        self._write(rec)
+
+    def finish(self, ids: list[int]):
+        """Marca a execução como concluída e compacta o arquivo."""
+        self._fh.close()
+        lines = [{"type": "run", "run": self.run}]
+        lines += [self.units[i] for i in ids if i in self.units]
+        lines.append({"type": "done", "run": self.run})
+
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in lines), encoding="utf-8")
+        tmp.replace(self.path)
+        self.complete = True
+
+    def _write(self, rec: dict):
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+
+# -------------------------
+# Crawler
+# -------------------------
+async def crawl(
+    ids: list[int],
+    checkpoint: Checkpoint,
+    base: str = BASE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    client: UpstreamClient | None = None,
+) -> dict:
+    client = client or upstream
+    sem = asyncio.Semaphore(concurrency)
+    stats = {"fetched": 0, "unchanged": 0, "resumed": 0, "errors": 0}
+    total = len(ids)
+
+    async def one(i: int, unit_id: int):
+        if checkpoint.done_in_this_run(unit_id):
+            stats["resumed"] += 1
+            return
+
+        url = f"{base}?id={unit_id}"
+        async with sem:
+            try:
+                resp = await asyncio.to_thread(client.fetch, url, checkpoint.validators(unit_id))
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"[{i}/{total}] ERRO id={unit_id}: {e}")
+                return
+
+        prev = checkpoint.units.get(unit_id)
+        if resp.not_modified:
+            stats["unchanged"] += 1
+            checkpoint.record(unit_id, prev["hash"], prev["data"], resp.validators)
+            print(f"[{i}/{total}] SEM MUDANÇA (304) id={unit_id}")
+            return
+
+        html = resp.text
+        page_hash = content_hash(html)
+        if prev and prev["hash"] == page_hash:
+            stats["unchanged"] += 1
+            checkpoint.record(unit_id, page_hash, prev["data"], resp.validators)
+            print(f"[{i}/{total}] SEM MUDANÇA id={unit_id}")
+            return
+
+        checkpoint.record(unit_id, page_hash, parse_detail(unit_id, url, html), resp.validators)
+        stats["fetched"] += 1
+        print(f"[{i}/{total}] OK id={unit_id}")
+
+    await asyncio.gather(*(one(i, unit_id) for i, unit_id in enumerate(ids, start=1)))
+    return stats
+
+
+def write_seed_from_list(list_html: str, base: str = BASE, out: Path = SEED):
+    # mesmo adaptador (parser e coordenadas) do scraping da API
+    source = QuixadaSource(list_url=base, detail_url=f"{base}?id={{id}}", headers=UA)
+    unidades = source.prepare(source.parse(list_html))
+    write_seed(out, unidades, fonte=base)
+    print(f"✅ Seed: {out} ({len(unidades)} unidades, {out.stat().st_size} bytes)")
+
+
+def write_unidades_py(unidades: list[dict], out: Path = OUT_PY):
     header = (
         "# Arquivo gerado automaticamente por scripts/scrape_unidades.py\n"
         "# Fonte: https://quixada.ce.gov.br/unidadesaude.php\n"
@@ -91,24 +272,56 @@ def write_unidades_py(unidades: list[dict]):
     # formata bonito como python
     body = "UNIDADES = " + pprint.pformat(unidades, width=110, sort_dicts=False) + "\n"
 
-    OUT_PY.write_text(header + body, encoding="utf-8")
-    print(f"✅ Gerado: {OUT_PY}")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(header + body, encoding="utf-8")
+    print(f"✅ Gerado: {out}")
 
 
 def main():
-    ids = scrape_ids()
+    parser = argparse.ArgumentParser(description="Gera o seed e app/data/unidades.py a partir do site da prefeitura.")
+    parser.add_argument("--base-url", default=BASE, help="URL da listagem (ex.: servidor local de fixtures)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="requisições por segundo")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST)
+    parser.add_argument("--checkpoint", type=Path, default=CHECKPOINT)
+    parser.add_argument("--out", type=Path, default=OUT_PY)
+    parser.add_argument("--seed", type=Path, default=SEED, help="seed snapshot carregado pela API no boot")
+    parser.add_argument("--seed-only", action="store_true", help="só gera o seed (passo de build)")
+    parser.add_argument("--fresh", action="store_true", help="ignora o checkpoint e busca tudo de novo")
+    args = parser.parse_args()
+
+    global upstream
+    upstream = make_upstream(args.rate, args.burst)
+
+    if args.fresh and args.checkpoint.exists():
+        args.checkpoint.unlink()
+
+    list_html = fetch_text(args.base_url)
+    write_seed_from_list(list_html, args.base_url, args.seed)
+    if args.seed_only:
+        return
+
+    ids = ids_from_list(BeautifulSoup(list_html, "lxml"))
     print(f"Encontrados {len(ids)} IDs.")
 
-    unidades = []
-    for i, unit_id in enumerate(ids, start=1):
-        try:
-            unidades.append(scrape_detail(unit_id))
-            print(f"[{i}/{len(ids)}] OK id={unit_id}")
-            time.sleep(0.5)  # seja educado com o servidor
-        except Exception as e:
-            print(f"[{i}/{len(ids)}] ERRO id={unit_id}: {e}")
+    checkpoint = Checkpoint(args.checkpoint)
+    if checkpoint.start():
+        print("Retomando execução interrompida.")
+
+    stats = asyncio.run(
+        crawl(ids, checkpoint, args.base_url, args.concurrency)
+    )
+    print(
+        f"Buscadas: {stats['fetched']}, sem mudança: {stats['unchanged']}, "
+        f"retomadas: {stats['resumed']}, erros: {stats['errors']}"
+    )
+    if stats["errors"]:
+        # deixa o checkpoint aberto: a próxima execução tenta só o que faltou
+        print("⚠️  Execução incompleta; rode novamente para continuar.")
+        return
 
-    write_unidades_py(unidades)
+    checkpoint.finish(ids)
+    write_unidades_py([checkpoint.units[i]["data"] for i in ids if i in checkpoint.units], args.out)
 
 
 if __name__ == "__main__":